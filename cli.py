@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""Headless CLI：TaskManagerのbulk import/export
+
+    python cli.py import backlog.jsonl [--batch-size 10000] [--resume]
+    python cli.py export out.md [--format md]
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import argparse
+import itertools
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import TASKS_PATH
+from logic.task_manager import TaskManager
+from logic.bulk_io import (FORMATS, checkpoint_path, guess_format, iter_records, load_checkpoint,
+                           read_records, write_records)
+
+
+def _log(msg: str) -> None:
+    """進捗はstderrへ（exportのstdout出力と混ざらないように）"""
+    print(msg, file=sys.stderr, flush=True)
+
+
+def _save_checkpoint(source: str, state: dict) -> None:
+    """checkpointをatomicに書き込み """
+    path = checkpoint_path(source)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(f"{path}.tmp", path)
+
+
+def _chunks(records, size: int):
+    """レコードをsize件ずつのリストにまとめる（メモリはbatch分のみ）"""
+    chunk = []
+    for rec in records:
+        chunk.append(rec)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def cmd_import(args) -> int:
+    """ファイルからタスクをimport（batch単位で1回のsaveにまとめる）"""
+    fmt = args.format or guess_format(args.source)
+    stat = os.stat(args.source)
+    state = {"records": 0, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "id_seed": str(uuid.uuid4())}
+    if args.resume:
+        saved = load_checkpoint(args.source)
+        if saved:
+            if (saved.get("size"), saved.get("mtime_ns")) != (stat.st_size, stat.st_mtime_ns):
+                _log("警告：前回のimport以降にsourceが変更されています / source changed since checkpoint")
+            state.update(saved)
+            _log(f"resume：{state['records']}件をスキップ / skipping already imported records")
+
+    manager = TaskManager(args.store)
+    # 親の検索をO(1)にするためのID索引（find_taskはツリー全体を走査する）
+    index = {}
+    stack = list(manager.get_all_tasks())
+    while stack:
+        t = stack.pop()
+        index[t.id] = t
+        stack.extend(t.subtasks)
+
+    skip = done = state["records"]
+    imported = skipped = 0
+    started = time.perf_counter()
+    with open(args.source, "r", encoding="utf-8", newline="") as fh:
+        records = itertools.islice(read_records(fh, fmt, id_seed=state["id_seed"]), skip, None)
+        for chunk in _chunks(records, args.batch_size):
+            # 1 chunk = 1回のsave。commit後にcheckpointを進める
+            with manager.batch():
+                for rec in chunk:
+                    if rec["id"] in index:
+                        skipped += 1  # 既にstoreにある（checkpoint直前に中断した場合など）
+                        continue
+                    parent = index.get(rec["parent"]) if rec["parent"] else None
+                    if rec["parent"] and parent is None:
+                        _log(f"警告：親 {rec['parent']} が見つからないためトップレベルに追加 / parent not found")
+                    index[rec["id"]] = manager.add_task(rec["name"], parent=parent, completed=rec["completed"],
+                                                        task_id=rec["id"])
+                    imported += 1
+            done += len(chunk)
+            state["records"] = done
+            _save_checkpoint(args.source, state)
+            elapsed = time.perf_counter() - started
+            _log(f"{done}件 commit済み / committed ({(done - skip) / elapsed:,.0f} rec/s)")
+
+    elapsed = time.perf_counter() - started
+    if os.path.exists(checkpoint_path(args.source)):
+        os.remove(checkpoint_path(args.source))
+    _log(f"完了 / done：{imported}件追加, {skipped}件スキップ, {elapsed:.2f}s "
+         f"({(done - skip) / elapsed if elapsed else 0:,.0f} rec/s)")
+    return 0
+
+
+def cmd_export(args) -> int:
+    """storeのタスクをファイル（または標準出力）にexport """
+    dest = args.dest
+    fmt = args.format or (guess_format(dest) if dest != "-" else "jsonl")
+    manager = TaskManager(args.store)
+    started = time.perf_counter()
+    records = iter_records(manager.get_all_tasks())
+    if dest == "-":
+        count = write_records(sys.stdout, fmt, records)
+    else:
+        with open(dest, "w", encoding="utf-8", newline="") as fh:
+            count = write_records(fh, fmt, records)
+    elapsed = time.perf_counter() - started
+    _log(f"完了 / done：{count}件, {elapsed:.2f}s ({count / elapsed if elapsed else 0:,.0f} rec/s)")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Todo bulk import/export")
+    parser.add_argument("--store", default=TASKS_PATH, help="tasks.jsonのパス（default: TASKS_PATH）")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_import = sub.add_parser("import", help="JSONL/CSV/Markdownからimport")
+    p_import.add_argument("source")
+    p_import.add_argument("--format", choices=FORMATS)
+    p_import.add_argument("--batch-size", type=int, default=10000, help="1回のsaveにまとめるレコード数")
+    p_import.add_argument("--resume", action="store_true", help="前回中断したimportを続きから再開")
+    p_import.set_defaults(func=cmd_import)
+
+    p_export = sub.add_parser("export", help="JSONL/CSV/Markdownへexport")
+    p_export.add_argument("dest", nargs="?", default="-", help="出力先（'-' は標準出力）")
+    p_export.add_argument("--format", choices=FORMATS)
+    p_export.set_defaults(func=cmd_export)
+
+    args = parser.parse_args(argv)
+    try:
+        return args.func(args)
+    except (OSError, ValueError) as e:
+        _log(f"❌ エラー / Error: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
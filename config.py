@@ -32,6 +32,9 @@ DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY")
 DEEPSEEK_API_URL = os.getenv("DEEPSEEK_API_URL", "https://api.deepseek.com/v1/chat/completions")
 DEEPSEEK_MODEL = os.getenv("DEEPSEEK_MODEL", "deepseek-chat")
 
+# 分解policy："auto"（API Keyがあればremote、なければlocal）/ "remote" / "local" / "local_then_remote"（opt-in）
+DECOMPOSE_POLICY = os.getenv("DECOMPOSE_POLICY", "auto")
+
 # タスク分解プロンプト
 TASK_DECOMPOSITION_PROMPT = """
 あなたは役立つアシスタントです。与えられたタスクをサブタスクのリストに分解し、必ず日本語で回答してください。
@@ -46,6 +49,22 @@ TASK_DECOMPOSITION_PROMPT = """
 ...
 """
 
+# structured output：JSON（{"subtasks": [...]}）で回答させる。"0"で従来の番号付きリスト
+DECOMPOSE_STRUCTURED = os.getenv("DECOMPOSE_STRUCTURED", "1") == "1"
+
+# structured output用のプロンプト（response_format=json_objectでは"JSON"という語が必要）
+TASK_DECOMPOSITION_JSON_PROMPT = """
+与えられたタスクをサブタスクに分解し、必ず日本語で、次のJSON schemaに従うJSONだけを出力してください。
+
+{schema}
+
+- title：サブタスクの内容（簡潔に）
+- estimate_minutes：所要時間の目安（分、任意）
+- order：実行する順番（1から、任意）
+
+タスク：{task_name}
+"""
+
 # ==============================================================================
 # Part 3: tasks.json 
 # ==============================================================================
@@ -80,4 +99,22 @@ def get_persistent_tasks_path():
     return str(persistent_tasks_path)
 
 # 上記の関数を呼び出し、最終的に使用するtasks.jsonのパスを取得
-TASKS_PATH = get_persistent_tasks_path()
\ No newline at end of file
+TASKS_PATH = get_persistent_tasks_path()
+
+# 保存形式："json"（default、interchange形式）/ "snapshot"（compact binary、tasks.snap）/
+#          "sharded"（プロジェクトごとのファイル、tasks.d/）
+TASKS_FORMAT = os.getenv("TASKS_FORMAT", "json")
+
+# perf overlay（F12）のprofile capture（Shift+F12）の出力先と、記録する操作の回数
+PROFILES_DIR = str(Path.home() / ".TodoApp" / "profiles")
+PROFILE_CAPTURE_INTERACTIONS = int(os.getenv("PROFILE_CAPTURE_INTERACTIONS", "20"))
+
+# タスク一覧の描画方式："widgets"（default、行ごとにwidget）または "canvas"（1つのcanvasに描画）
+TASK_LIST_RENDERER = os.getenv("TASK_LIST_RENDERER", "widgets")
+
+# 起動時に完了済みプロジェクトを自動でarchive（tasks.jsonと同じ場所の archive/ へ）
+# 経過時間による条件はない（タスクは日時を保存していない）。古い未完了のプロジェクトは手動でarchiveする
+AUTO_ARCHIVE = os.getenv("AUTO_ARCHIVE", "1") == "1"
+
+# headless service（service.py）のURL。設定するとTodoAppはローカルのtasks.jsonではなくserviceを操作する
+TODO_SERVICE_URL = os.getenv("TODO_SERVICE_URL") or None
\ No newline at end of file
@@ -0,0 +1,173 @@
+"""Archive（cold storage）：完了したプロジェクトをgzip shardに移し、working setを小さく保つ
+
+    archive/
+      index.json                 一覧表示用の軽量index（shardを開かずにbrowseできる）
+      archive-YYYY-MM.jsonl.gz   1行 = 1プロジェクト（Task.to_dict）、月ごとのshard
+
+shardへの追加はgzip memberの追記のみで、既存データを書き直さない。
+同じstoreを複数のインスタンスが使うため、変更はarchive/.lockを取得し、indexを読み直してから行う。
+"""
+import os
+import gzip
+import json
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from logic.shared_store import FileLock, atomic_write_text, file_fingerprint
+
+
+class Archive:
+    """archiveディレクトリの読み書き（スレッド制御は呼び出し側で行う）"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.index_path = os.path.join(directory, "index.json")
+        self._lock = FileLock(os.path.join(directory, ".lock"))  # プロセス間のadvisory lock
+        self._entries: List[Dict[str, Any]] = []
+        self._restored: List[str] = []  # 復元されたプロジェクト（自動archiveの対象外）
+        self._index_fingerprint = None  # 最後に読んだindex.jsonのfingerprint
+
+    # ---------- index ----------
+    def _load_index(self) -> None:
+        """index.jsonが前回読んだ時から変わっていれば読み直す（他のインスタンスの変更を取り込む）"""
+        fingerprint = file_fingerprint(self.index_path)
+        if fingerprint is not None and fingerprint == self._index_fingerprint:
+            return
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            data = {}
+        self._entries = data.get("entries", [])
+        self._restored = data.get("restored", [])
+        self._index_fingerprint = fingerprint
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """archive済みプロジェクトの一覧（新しい順）。shardは開かない """
+        self._load_index()
+        return sorted(self._entries, key=lambda e: e["archived_at"], reverse=True)
+
+    def _save_index(self) -> None:
+        """indexを書き込む（self._lockを取得し、_load_indexで読み直した後に呼ぶ）"""
+        data = {"entries": self._entries, "restored": self._restored}
+        atomic_write_text(self.index_path, json.dumps(data, ensure_ascii=False))
+        self._index_fingerprint = file_fingerprint(self.index_path)
+
+    def was_restored(self, task_id: str) -> bool:
+        """ユーザーが復元したプロジェクトか（自動archiveで再びしまわないため）"""
+        self._load_index()
+        return task_id in self._restored
+
+    def _entry(self, task_id: str) -> Optional[Dict[str, Any]]:
+        return next((e for e in self.entries() if e["id"] == task_id), None)
+
+    # ---------- shard ----------
+    def _shard_path(self, shard: str) -> str:
+        return os.path.join(self.directory, shard)
+
+    def _iter_shard(self, shard: str) -> Iterator[str]:
+        """shardを1行ずつstreamで読む """
+        try:
+            with gzip.open(self._shard_path(shard), "rt", encoding="utf-8") as f:
+                yield from f
+        except FileNotFoundError:
+            return
+
+    @staticmethod
+    def _line_prefix(task_id: str) -> str:
+        # Task.to_dictは"id"が先頭なので、JSONを解析せずに目的の行を見つけられる
+        return '{"id": ' + json.dumps(task_id, ensure_ascii=False)
+
+    def add(self, tasks: List) -> None:
+        """プロジェクトを今月のshardに追記し、indexを更新 """
+        if not tasks:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        shard = time.strftime("archive-%Y-%m.jsonl.gz")
+        lines = "".join(json.dumps(t.to_dict(), ensure_ascii=False) + "\n" for t in tasks)
+        with self._lock:
+            # "ab"：新しいgzip memberとして追記（gzipは連結されたmemberをそのまま読める）
+            with gzip.open(self._shard_path(shard), "ab") as f:
+                f.write(lines.encode("utf-8"))
+            self._load_index()
+            self._add_entries(tasks, shard)
+            self._save_index()
+
+    def _add_entries(self, tasks: List, shard: str) -> None:
+        archived_ids = {t.id for t in tasks}
+        self._restored = [i for i in self._restored if i not in archived_ids]
+        now = time.time()
+        for t in tasks:
+            total, done = _count_descendants(t)
+            self._entries.append({
+                "id": t.id,
+                "name": t.name,
+                "subtasks": total,
+                "completed_subtasks": done,
+                "archived_at": now,
+                "shard": shard,
+            })
+
+    def load(self, task_id: str, task_cls) -> Optional[Any]:
+        """archive済みプロジェクトを1件だけ読み込む（該当shardのみ走査）"""
+        entry = self._entry(task_id)
+        if not entry:
+            return None
+        prefix = self._line_prefix(task_id)
+        for line in self._iter_shard(entry["shard"]):
+            if line.startswith(prefix):
+                return task_cls.from_dict(json.loads(line))
+        return None
+
+    def remove(self, task_id: str, task_cls) -> Optional[Any]:
+        """archiveからプロジェクトを取り出す（shardから削除しindexを更新）"""
+        if not os.path.isdir(self.directory):
+            return None
+        with self._lock:
+            return self._remove(task_id, task_cls)
+
+    def _remove(self, task_id: str, task_cls) -> Optional[Any]:
+        entry = self._entry(task_id)
+        if not entry:
+            return None
+        prefix = self._line_prefix(task_id)
+        found = None
+        kept: List[str] = []
+        for line in self._iter_shard(entry["shard"]):
+            if found is None and line.startswith(prefix):
+                found = task_cls.from_dict(json.loads(line))
+            else:
+                kept.append(line)
+        # cold pathなのでshardは単純に書き直す
+        path = self._shard_path(entry["shard"])
+        if kept:
+            tmp_path = f"{path}.tmp"
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+                f.writelines(kept)
+            os.replace(tmp_path, path)
+        elif os.path.exists(path):
+            os.remove(path)
+        self._entries = [e for e in self._entries if e["id"] != task_id]
+        self._restored.append(task_id)
+        self._save_index()
+        return found
+
+
+def _count_descendants(task) -> tuple:
+    """（子孫の総数、完了済みの子孫数）"""
+    total = done = 0
+    stack = list(task.subtasks)
+    while stack:
+        t = stack.pop()
+        total += 1
+        done += t.completed
+        stack.extend(t.subtasks)
+    return total, done
+
+
+def is_fully_completed(task) -> bool:
+    """プロジェクトが完了しているか：子孫がすべて完了（子孫がない場合は自身が完了）"""
+    total, done = _count_descendants(task)
+    if total == 0:
+        return task.completed
+    return done == total
@@ -0,0 +1,184 @@
+"""タスク分解のbackend：OpenAI互換HTTP API（DeepSeekなど）とオフラインのlocal backend"""
+import abc
+import json
+import time
+import requests
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from config import TASK_DECOMPOSITION_JSON_PROMPT, TASK_DECOMPOSITION_PROMPT
+from logic.subtask_parser import SUBTASK_SCHEMA, SubtaskFormatError, parse_structured, parse_text
+
+SYSTEM_PROMPT = "あなたは役立つアシスタントです。与えられたタスクをサブタスクのリストに分解し、必ず日本語で回答してください。回答は必ず数字で始まる箇条書きの形式で、余計な説明は不要です。"
+SYSTEM_PROMPT_JSON = "あなたは役立つアシスタントです。与えられたタスクをサブタスクに分解し、必ず日本語で、指定されたJSON形式だけで回答してください。"
+
+
+class DecompositionError(Exception):
+    """分解に失敗（メッセージはそのままユーザーに表示される）"""
+
+
+class DecompositionBackend(abc.ABC):
+    """分解backendのinterface：タスク名からサブタスク名のリストを返す """
+
+    name = "base"
+
+    @abc.abstractmethod
+    def decompose(self, task_name: str) -> List[str]:
+        """失敗時はDecompositionErrorを送出 """
+
+
+# ---------- HTTP（OpenAI互換chat completions） ----------
+class HttpBackend(DecompositionBackend):
+    """DeepSeek / OpenAI互換のchat completions APIを呼び出すbackend（retry + 指数backoff）"""
+
+    name = "remote"
+
+    def __init__(self, api_key: Optional[str], api_url: str, model: str, retries: int = 3, timeout: float = 30,
+                 structured: bool = True):
+        self.api_key = api_key
+        self.api_url = api_url
+        self.model = model
+        self.retries = retries
+        self.timeout = timeout
+        self.structured = structured  # response_format=json_objectで回答させる
+        # どちらのparserで解析できたか（text fallbackの頻度と解析時間を把握するため）
+        self.parse_stats = {"structured": 0, "text": 0, "parse_ms": 0.0}
+
+    @property
+    def available(self) -> bool:
+        """API Keyが設定されているか """
+        return bool(self.api_key)
+
+    def decompose(self, task_name: str) -> List[str]:
+        # Quick fail：API Keyが不足
+        if not self.api_key:
+            raise DecompositionError("API Keyが設定されていません（環境変数DEEPSEEK_API_KEYを設定してください）。")
+
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+
+        last_error = None
+        for attempt in range(self.retries):
+            try:
+                resp = requests.post(self.api_url, headers=headers, json=self._payload(task_name), timeout=self.timeout)
+                if self.structured and resp.status_code in (400, 422):
+                    # response_formatに未対応のAPI：以降は番号付きリストで依頼する
+                    self.structured = False
+                    resp = requests.post(self.api_url, headers=headers, json=self._payload(task_name),
+                                         timeout=self.timeout)
+                resp.raise_for_status()
+                content = resp.json()["choices"][0]["message"]["content"]
+                names = self._parse(content)
+                if names:
+                    return names
+                # 空の結果は失敗として扱う（local結果を空で置き換えないため）
+                last_error = "回答からサブタスクを取得できませんでした"
+            except requests.RequestException as e:
+                last_error = f"ネットワーク/リクエストエラー：{e}"  # Network/request error
+            except (KeyError, ValueError) as e:
+                last_error = f"レスポンス解析失敗：{e}"
+            # 指数backoff
+            if attempt + 1 < self.retries:
+                time.sleep(2 ** attempt)
+        raise DecompositionError(last_error or "未知のエラー")
+
+    def _payload(self, task_name: str) -> dict:
+        """chat completionsのrequest body """
+        if self.structured:
+            prompt = TASK_DECOMPOSITION_JSON_PROMPT.format(
+                schema=json.dumps(SUBTASK_SCHEMA, ensure_ascii=False), task_name=task_name)
+            messages = [{"role": "system", "content": SYSTEM_PROMPT_JSON}, {"role": "user", "content": prompt}]
+        else:
+            messages = [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": TASK_DECOMPOSITION_PROMPT.format(task_name=task_name)}
+            ]
+        payload = {"model": self.model, "messages": messages, "stream": False}
+        if self.structured:
+            payload["response_format"] = {"type": "json_object"}
+        return payload
+
+    def _parse(self, content: str) -> List[str]:
+        """回答を解析し、使ったparserと所要時間を記録 """
+        started = time.perf_counter()
+        names, parser = parse_response(content)
+        self.parse_stats[parser] += 1
+        self.parse_stats["parse_ms"] += (time.perf_counter() - started) * 1000
+        return names
+
+
+def parse_response(content: str) -> Tuple[List[str], str]:
+    """回答を解析して (サブタスク名, 使ったparser) を返す
+
+    structured output（JSON）として検証できればその順序で、できなければ番号付きリストとして解析する。
+    見積もり（estimate_minutes）はTaskに保存しないので名前のみを返す。
+    """
+    try:
+        return [s.title for s in parse_structured(content)], "structured"
+    except SubtaskFormatError:
+        return parse_text(content), "text"
+
+
+def parse_subtasks(content: str) -> List[str]:
+    """サブタスクを解析 / Parse subtasks"""
+    return parse_response(content)[0]
+
+
+# ---------- Local（オフライン） ----------
+class LocalBackend(DecompositionBackend):
+    """オフラインで即座に結果を返すbackend
+
+    過去に分解されたタスク（tasks.jsonにある子を持つタスク）から最も似た名前のものを探し、
+    そのサブタスクをtemplateとして使う。似たものがなければ汎用のtemplateを返す。
+    """
+
+    name = "local"
+    MIN_SIMILARITY = 0.3
+    GENERIC_TEMPLATE = [
+        "「{name}」の目的とゴールを明確にする",
+        "必要な情報・資料を集める",
+        "作業を小さなステップに分けて計画する",
+        "「{name}」に取りかかる",
+        "結果を確認して振り返る",
+    ]
+
+    def __init__(self, examples: Callable[[], Iterable]):
+        # examples：学習元のタスクツリーを返す関数（呼び出し時点の内容を使う）
+        self.examples = examples
+
+    def decompose(self, task_name: str) -> List[str]:
+        match = self.best_match(task_name)
+        if match is not None:
+            # 元のタスク名を含むサブタスク名は、分解するタスクの名前に置き換える
+            return [t.name.replace(match.name, task_name) for t in match.subtasks]
+        return self._template(task_name)
+
+    def _template(self, task_name: str) -> List[str]:
+        return [line.format(name=task_name) for line in self.GENERIC_TEMPLATE]
+
+    def best_match(self, task_name: str):
+        """名前が最も似ている分解済みタスク（類似度がMIN_SIMILARITY未満ならNone）"""
+        target = _bigrams(task_name)
+        best, best_score = None, self.MIN_SIMILARITY
+        stack = list(self.examples())
+        while stack:
+            t = stack.pop()
+            stack.extend(t.subtasks)
+            if not t.subtasks or t.name == task_name:
+                continue
+            if [c.name for c in t.subtasks] == self._template(t.name):
+                continue  # 汎用templateの結果は学習元にしない
+            grams = _bigrams(t.name)
+            score = len(target & grams) / len(target | grams) if target or grams else 0.0
+            if score >= best_score:
+                best, best_score = t, score
+        return best
+
+
+def _bigrams(text: str) -> set:
+    """文字bigramの集合（空白で区切られない日本語でも使える類似度の単位）"""
+    text = "".join(text.lower().split())
+    if len(text) < 2:
+        return {text} if text else set()
+    return {text[i:i + 2] for i in range(len(text) - 1)}
@@ -0,0 +1,155 @@
+"""Bulk import/export：JSONL / CSV / Markdown outline のストリーミング読み書き
+
+どのフォーマットも1レコード = 1タスク {id, name, completed, parent, depth} で、
+親は必ず子より先に現れる（pre-order）。読み込みは1行ずつ、書き出しはツリーを走査しながら行う。
+"""
+import csv
+import json
+import re
+import uuid
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO
+
+FORMATS = ("jsonl", "csv", "md")
+CSV_FIELDS = ["id", "name", "completed", "parent"]
+
+# "- [ ] name" / "- [x] name" / "* name"（インデント2スペース = 1階層）
+_MD_ITEM = re.compile(r"^(?P<indent>[ \t]*)[-*+]\s+(?:\[(?P<mark>[ xX])\]\s+)?(?P<name>.*\S)\s*$")
+
+
+def guess_format(path: str) -> str:
+    """拡張子からフォーマットを推定 """
+    lower = path.lower()
+    if lower.endswith((".md", ".markdown")):
+        return "md"
+    if lower.endswith(".csv"):
+        return "csv"
+    return "jsonl"
+
+
+# ---------- 読み込み ----------
+def read_records(fh: TextIO, fmt: str, id_seed: str = "") -> Iterator[Dict[str, Any]]:
+    """ファイルからレコードを1件ずつ読み込む（メモリ使用量は一定）
+
+    id_seed：IDを持たないレコード（Markdown、idのないJSONL/CSV）で決定的なIDを作るためのseed。
+    同じseedで読み直すと同じIDになるので、中断後のresumeで親子関係を復元できる。
+    """
+    namespace = uuid.uuid5(uuid.NAMESPACE_URL, f"todo-import:{id_seed}")
+    if fmt == "jsonl":
+        return _read_jsonl(fh, namespace)
+    if fmt == "csv":
+        return _read_csv(fh, namespace)
+    if fmt == "md":
+        return _read_markdown(fh, namespace)
+    raise ValueError(f"未対応のフォーマット：{fmt}")
+
+
+def _read_jsonl(fh: TextIO, namespace: uuid.UUID) -> Iterator[Dict[str, Any]]:
+    for lineno, line in enumerate(fh, 1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"{lineno}行目：JSON解析失敗：{e}") from None
+        if not isinstance(data, dict):
+            raise ValueError(f"{lineno}行目：objectではありません")
+        yield _normalize(data, lineno, namespace)
+
+
+def _read_csv(fh: TextIO, namespace: uuid.UUID) -> Iterator[Dict[str, Any]]:
+    for lineno, row in enumerate(csv.DictReader(fh), 2):
+        yield _normalize(row, lineno, namespace)
+
+
+def _read_markdown(fh: TextIO, namespace: uuid.UUID) -> Iterator[Dict[str, Any]]:
+    stack: List[tuple] = []  # (indent幅, id)：現在の祖先
+    for lineno, line in enumerate(fh, 1):
+        m = _MD_ITEM.match(line.rstrip("\n"))
+        if not m:
+            continue
+        indent = len(m.group("indent").expandtabs(2))
+        while stack and stack[-1][0] >= indent:
+            stack.pop()
+        task_id = str(uuid.uuid5(namespace, str(lineno)))
+        yield {
+            "id": task_id,
+            "name": m.group("name"),
+            "completed": (m.group("mark") or " ").lower() == "x",
+            "parent": stack[-1][1] if stack else None,
+        }
+        stack.append((indent, task_id))
+
+
+def _normalize(data: Dict[str, Any], lineno: int, namespace: uuid.UUID) -> Dict[str, Any]:
+    """JSONL/CSVのレコードを共通の形に揃える（idがなければ行番号から決定的に作る）"""
+    name = str(data.get("name") or "").strip()
+    if not name:
+        raise ValueError(f"{lineno}行目：nameがありません")
+    completed = data.get("completed", False)
+    if isinstance(completed, str):
+        completed = completed.strip().lower() in ("1", "true", "yes", "x")
+    return {
+        "id": str(data.get("id") or uuid.uuid5(namespace, str(lineno))),
+        "name": name,
+        "completed": bool(completed),
+        "parent": data.get("parent") or None,
+    }
+
+
+# ---------- 書き出し ----------
+def iter_records(tasks: Iterable) -> Iterator[Dict[str, Any]]:
+    """タスクツリーをpre-orderでレコードに変換（コピーを作らずに走査）"""
+    stack = [(t, None, 0) for t in reversed(list(tasks))]
+    while stack:
+        task, parent_id, depth = stack.pop()
+        yield {
+            "id": task.id,
+            "name": task.name,
+            "completed": task.completed,
+            "parent": parent_id,
+            "depth": depth,
+        }
+        stack.extend((c, task.id, depth + 1) for c in reversed(task.subtasks))
+
+
+def write_records(fh: TextIO, fmt: str, records: Iterable[Dict[str, Any]]) -> int:
+    """レコードを1件ずつ書き出し、書き出した件数を返す """
+    count = 0
+    if fmt == "jsonl":
+        for r in records:
+            fh.write(json.dumps({k: r[k] for k in CSV_FIELDS}, ensure_ascii=False))
+            fh.write("\n")
+            count += 1
+    elif fmt == "csv":
+        writer = csv.DictWriter(fh, fieldnames=CSV_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        for r in records:
+            writer.writerow(r)
+            count += 1
+    elif fmt == "md":
+        for r in records:
+            mark = "x" if r["completed"] else " "
+            fh.write(f"{'  ' * r.get('depth', 0)}- [{mark}] {_md_escape(r['name'])}\n")
+            count += 1
+    else:
+        raise ValueError(f"未対応のフォーマット：{fmt}")
+    return count
+
+
+def _md_escape(name: str) -> str:
+    """Markdown outlineで1行に収まるように改行を空白に置換 """
+    return " ".join(name.splitlines())
+
+
+def checkpoint_path(source: str) -> str:
+    """resume用のcheckpointファイルのパス """
+    return f"{source}.import-state"
+
+
+def load_checkpoint(source: str) -> Optional[Dict[str, Any]]:
+    """checkpointを読み込み、存在しない場合はNone"""
+    try:
+        with open(checkpoint_path(source), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
@@ -0,0 +1,181 @@
+"""service.pyのclient：TaskManagerと同じinterfaceでHTTP service上のタスクを操作する
+
+TodoAppはTODO_SERVICE_URLが設定されていればTaskManagerの代わりにこれを使う。
+タスクツリーはGET /tasks（ETag付き）の結果をcacheし、変更操作のたびとchange feedの通知で再取得する。
+"""
+import time
+import threading
+from typing import Any, Callable, Dict, List, Optional, Set
+from urllib.parse import quote
+
+import requests
+
+from logic.task_manager import Task
+
+
+class RemoteTaskManager:
+    """HTTP service上のTaskManager（UIが使うmethodのみ）"""
+
+    def __init__(self, base_url: str, timeout: float = 10):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.tasks: List[Task] = []
+        self.version: Optional[str] = None  # serviceのversion（ETagの中身、"<epoch>-<連番>"）
+        self._session = requests.Session()
+        self._refresh_lock = threading.Lock()
+        self._watch_stop: Optional[threading.Event] = None
+        # perf overlay用（save = 変更requestの往復、load = ツリーの再取得）
+        self.stats: Dict[str, Any] = {"save_ms": None, "load_ms": None, "saves": 0, "decompose_in_flight": 0}
+        self.refresh()  # serviceに接続できなければrequests.RequestException（起動時に表示）
+
+    # ---------- HTTP ----------
+    def _url(self, *parts: str) -> str:
+        return "/".join([self.base_url] + [quote(p, safe="") for p in parts])
+
+    def _request(self, method: str, *parts: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        return self._session.request(method, self._url(*parts), **kwargs)
+
+    def _mutate(self, method: str, *parts: str, **kwargs) -> Optional[requests.Response]:
+        """変更操作：成功したらツリーを再取得。失敗（通信エラー / 4xx / 5xx）はNone """
+        started = time.perf_counter()
+        try:
+            resp = self._request(method, *parts, **kwargs)
+        except requests.RequestException:
+            return None
+        self.stats["save_ms"] = (time.perf_counter() - started) * 1000
+        self.stats["saves"] += 1
+        if not resp.ok:
+            return None
+        try:
+            self.refresh()
+        except requests.RequestException:
+            return None  # 書き込みは成功済み。ツリーは次の変更通知で再取得される
+        return resp
+
+    def refresh(self) -> bool:
+        """GET /tasks（If-None-Match）。ツリーが変わっていればTrue """
+        with self._refresh_lock:
+            started = time.perf_counter()
+            headers = {"If-None-Match": f'"{self.version}"'} if self.version is not None else {}
+            resp = self._request("GET", "tasks", headers=headers)
+            if resp.status_code == 304:
+                return False
+            resp.raise_for_status()
+            # 参照の差し替えのみなので、UI threadは古いツリーか新しいツリーのどちらかを見る
+            self.tasks = [Task.from_dict(t) for t in resp.json().get("tasks", [])]
+            self.version = resp.headers["ETag"].strip('"')
+            self.stats["load_ms"] = (time.perf_counter() - started) * 1000
+            return True
+
+    # ---------- タスク操作 ----------
+    def add_task(self, name: str, parent: Optional[Task] = None, completed: bool = False) -> Optional[Task]:
+        body = {"name": name, "completed": completed}
+        if parent is not None:
+            body["parent"] = parent.id
+        resp = self._mutate("POST", "tasks", json=body)
+        return self.find_task(resp.json()["tasks"][0]["id"]) if resp is not None else None
+
+    def find_task(self, task_id: str) -> Optional[Task]:
+        """タスクを検索 """
+        def _dfs(nodes: List[Task]) -> Optional[Task]:
+            for t in nodes:
+                if t.id == task_id:
+                    return t
+                found = _dfs(t.subtasks)
+                if found:
+                    return found
+            return None
+        return _dfs(self.tasks)
+
+    def toggle_task_completion(self, task_id: str) -> bool:
+        return self._mutate("POST", "tasks", task_id, "toggle") is not None
+
+    def get_all_tasks(self) -> List[Task]:
+        return self.tasks
+
+    def update_task(self, task_id: str, name: Optional[str] = None, completed: Optional[bool] = None) -> bool:
+        body = {k: v for k, v in (("name", name), ("completed", completed)) if v is not None}
+        return self._mutate("PATCH", "tasks", task_id, json=body) is not None
+
+    def delete_task(self, task_id: str) -> bool:
+        return self._mutate("DELETE", "tasks", task_id) is not None
+
+    def decompose_task(self, task_id: str, callback=None) -> None:
+        """serviceで分解し、最初の結果が反映されたらcallback(success, error)
+
+        local_then_remoteのremote結果はchange feed経由で届く。
+        """
+        def worker():
+            try:
+                resp = self._request("POST", "tasks", task_id, "decompose", params={"wait": "1"}, timeout=None)
+                data = resp.json()
+                if resp.ok:
+                    self.refresh()
+                ok, error = bool(data.get("ok")), data.get("error")
+            except (requests.RequestException, ValueError) as e:
+                ok, error = False, f"serviceに接続できません：{e}"
+            self.stats["decompose_in_flight"] -= 1
+            if callback:
+                callback(ok, error)
+
+        self.stats["decompose_in_flight"] += 1
+        threading.Thread(target=worker, daemon=True).start()
+
+    # ---------- Archive ----------
+    def archive_tasks(self, task_ids: List[str]) -> int:
+        resp = self._mutate("POST", "archive", json={"ids": list(task_ids)})
+        return resp.json()["archived"] if resp is not None else 0
+
+    def auto_archive(self) -> int:
+        resp = self._mutate("POST", "archive", json={"completed": True})
+        return resp.json()["archived"] if resp is not None else 0
+
+    def get_archived_tasks(self) -> List[Dict[str, Any]]:
+        try:
+            return self._request("GET", "archive").json()["entries"]
+        except (requests.RequestException, ValueError, KeyError):
+            return []
+
+    def load_archived_task(self, task_id: str) -> Optional[Task]:
+        try:
+            resp = self._request("GET", "archive", task_id)
+        except requests.RequestException:
+            return None
+        return Task.from_dict(resp.json()) if resp.ok else None
+
+    def restore_task(self, task_id: str) -> Optional[Task]:
+        resp = self._mutate("POST", "archive", task_id, "restore")
+        return self.find_task(resp.json()["id"]) if resp is not None else None
+
+    # ---------- change feed ----------
+    def start_watching(self, on_change: Callable[[Set[str], bool], None]) -> None:
+        """GET /changesをlong-pollし、versionが進んだらツリーを再取得して on_change(set(), True)
+
+        変更されたIDはserviceから届かないので、常にstructural=Trueとして通知する。
+        """
+        if self._watch_stop:
+            return
+        stop = self._watch_stop = threading.Event()
+        # long-poll用のsession（UI threadのrequestと接続を共有しない）
+        session = requests.Session()
+
+        def loop():
+            while not stop.is_set():
+                since = self.version or ""
+                try:
+                    resp = session.get(self._url("changes"), params={"since": since, "timeout": 25},
+                                       timeout=self.timeout + 25)
+                    version = resp.json()["version"]
+                    if version != since and self.refresh() and not stop.is_set():
+                        on_change(set(), True)
+                except (requests.RequestException, ValueError, KeyError):
+                    stop.wait(2)  # serviceの再起動待ち
+            session.close()
+
+        threading.Thread(target=loop, daemon=True).start()
+
+    def stop_watching(self) -> None:
+        if self._watch_stop:
+            self._watch_stop.set()
+            self._watch_stop = None
@@ -0,0 +1,92 @@
+"""Sharded persistence：トップレベルのプロジェクトごとに1ファイル + 順序を持つmanifest
+
+    tasks.d/
+      manifest.json   {"version": n, "tasks": [id, ...]}（表示順、保存のたびに更新）
+      <id>.json       1プロジェクト（Task.to_dict）
+
+保存時はdirtyなプロジェクトのshardのみを書き直す。削除はmanifestの更新（とshardのunlink）だけで済む。
+外部変更の検知にはmanifestだけでなくshardも含めたfingerprint()を使う（shardだけが編集される場合があるため）。
+"""
+import os
+import re
+import json
+import hashlib
+from typing import List, Optional, Tuple
+
+from logic.shared_store import atomic_write_text, file_fingerprint
+
+_SAFE_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class ShardedStore:
+    """shardディレクトリの読み書き（ロックは呼び出し側で取得）"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, "manifest.json")
+        self._version = 0
+        self._written_ids: Optional[List[str]] = None  # 最後に読み書きしたmanifestの内容
+
+    def shard_path(self, task_id: str) -> str:
+        """shardファイルのパス（ファイル名に使えないIDはhash化）"""
+        name = task_id if _SAFE_ID.match(task_id) else hashlib.sha1(task_id.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{name}.json")
+
+    def fingerprint(self) -> Optional[Tuple]:
+        """変更検知用：manifestとディレクトリ内の全shardのfingerprint（manifestがなければNone）"""
+        manifest = file_fingerprint(self.manifest_path)
+        if manifest is None:
+            return None
+        shards = []
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if not entry.name.endswith(".json") or entry.name == "manifest.json":
+                        continue
+                    try:
+                        st = entry.stat()
+                    except FileNotFoundError:
+                        continue  # 走査中に削除された
+                    shards.append((entry.name, st.st_mtime_ns, st.st_size, st.st_ino))
+        except FileNotFoundError:
+            return None
+        return manifest, tuple(sorted(shards))
+
+    def read(self, task_cls) -> List:
+        """manifestの順にshardを読み込む """
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        tasks = []
+        for task_id in manifest.get("tasks", []):
+            try:
+                with open(self.shard_path(task_id), "r", encoding="utf-8") as f:
+                    tasks.append(task_cls.from_dict(json.load(f)))
+            except FileNotFoundError:
+                continue  # manifestより先にshardが消された（外部での削除途中など）
+        self._version = manifest.get("version", 0)
+        self._written_ids = [t.id for t in tasks]
+        return tasks
+
+    def write(self, tasks: List) -> int:
+        """dirtyなプロジェクトのshardとmanifestを書き込み、書き直したshard数を返す """
+        os.makedirs(self.directory, exist_ok=True)
+        written = 0
+        for task in tasks:
+            if task.dirty:
+                atomic_write_text(self.shard_path(task.id), task.to_json())
+                written += 1
+
+        # manifestは小さいので毎回書く（versionの更新で他のインスタンスが変更を検知できる）
+        ids = [t.id for t in tasks]
+        self._version += 1
+        atomic_write_text(self.manifest_path, json.dumps({"version": self._version, "tasks": ids}))
+
+        # manifestから外れたプロジェクトのshardを削除（書き直しは不要）
+        if self._written_ids:
+            for task_id in set(self._written_ids).difference(ids):
+                try:
+                    os.remove(self.shard_path(task_id))
+                except FileNotFoundError:
+                    pass
+        self._written_ids = ids
+        return written
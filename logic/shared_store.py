@@ -0,0 +1,197 @@
+"""Shared store support：advisory file lock + file watcher（inotify / polling）"""
+import os
+import sys
+import time
+import select
+import struct
+import threading
+from typing import Callable, Optional, Tuple
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+
+# ---------- Advisory file lock ----------
+class FileLock:
+    """プロセス間のadvisory lock（POSIX: flock / Windows: msvcrt.locking）
+
+    tasks.json自体はatomic replaceで書き換えるため、ロックは隣の ``.lock`` ファイルに掛ける。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fh = None
+
+    def acquire(self) -> None:
+        """排他ロックを取得（取得できるまでblock）"""
+        fh = open(self.path, "a+b")
+        try:
+            if os.name == "nt":
+                fh.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        # LK_LOCKは約10秒でtimeoutするので取得できるまで繰り返す
+                        continue
+            else:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+        except Exception:
+            fh.close()
+            raise
+        self._fh = fh
+
+    def release(self) -> None:
+        """ロックを解放 """
+        fh, self._fh = self._fh, None
+        if fh is None:
+            return
+        try:
+            if os.name == "nt":
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+        finally:
+            fh.close()
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.release()
+
+
+def file_fingerprint(path: str) -> Optional[Tuple[int, int, int]]:
+    """変更検知用のfingerprint (mtime_ns, size, inode)、存在しない場合はNone"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def atomic_write_text(path: str, text: str) -> None:
+    """一時ファイルに書いてからos.replace（読み手が書きかけのファイルを見ないように）"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+# ---------- File watcher ----------
+class PollingWatcher:
+    """fingerprintを定期的に比較するwatcher（全プラットフォーム対応のfallback）
+
+    fingerprint：比較に使う関数（省略時はpathのfile_fingerprint）。
+    指定した場合はpathと同じディレクトリ内の全ファイルの変更を対象とする。
+    """
+
+    def __init__(self, path: str, callback: Callable[[], None], interval: float = 1.0,
+                 fingerprint: Optional[Callable[[], object]] = None):
+        self.path = path
+        self.callback = callback
+        self.interval = interval
+        self.fingerprint = fingerprint or (lambda: file_fingerprint(path))
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="store-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        last = self.fingerprint()
+        while not self._stop.wait(self.interval):
+            current = self.fingerprint()
+            if current != last:
+                last = current
+                self.callback()
+
+
+class InotifyWatcher(PollingWatcher):
+    """Linux inotifyによるwatcher：親ディレクトリを監視し、対象ファイル名のイベントのみ通知 """
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    _EVENT = struct.Struct("iIII")
+
+    def __init__(self, path: str, callback: Callable[[], None], interval: float = 0.5,
+                 fingerprint: Optional[Callable[[], object]] = None):
+        super().__init__(path, callback, interval, fingerprint)
+        import ctypes
+        import ctypes.util
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        directory = os.path.dirname(os.path.abspath(path))
+        # atomic replace（IN_MOVED_TO）とin-place書き込み（IN_CLOSE_WRITE）の両方を拾う
+        mask = self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_CREATE | self.IN_MODIFY
+        if self._libc.inotify_add_watch(self._fd, os.fsencode(directory), mask) < 0:
+            os.close(self._fd)
+            raise OSError(ctypes.get_errno(), "inotify_add_watch failed")
+        # fingerprint指定時はディレクトリ内の全ファイルが対象
+        self._name = None if fingerprint else os.fsencode(os.path.basename(path))
+
+    def _run(self) -> None:
+        try:
+            while not self._stop.is_set():
+                # stop()に反応できるようにtimeout付きで待つ
+                ready, _, _ = select.select([self._fd], [], [], self.interval)
+                if not ready:
+                    continue
+                try:
+                    buf = os.read(self._fd, 64 * 1024)
+                except BlockingIOError:
+                    continue
+                if self._matches(buf):
+                    # 連続イベント（write → close → rename）を1回にまとめる
+                    time.sleep(0.05)
+                    self._drain()
+                    self.callback()
+        finally:
+            os.close(self._fd)
+
+    def _matches(self, buf: bytes) -> bool:
+        """イベントバッファに対象ファイル名が含まれるか """
+        offset = 0
+        while offset + self._EVENT.size <= len(buf):
+            _, _, _, length = self._EVENT.unpack_from(buf, offset)
+            offset += self._EVENT.size
+            name = buf[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if self._name is None or name == self._name:
+                return True
+        return False
+
+    def _drain(self) -> None:
+        """溜まっている残りのイベントを読み捨て """
+        while True:
+            try:
+                if not os.read(self._fd, 64 * 1024):
+                    return
+            except BlockingIOError:
+                return
+
+
+def create_watcher(path: str, callback: Callable[[], None],
+                   fingerprint: Optional[Callable[[], object]] = None) -> PollingWatcher:
+    """Linuxではinotify、それ以外（または失敗時）はpollingのwatcherを作成 """
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(path, callback, fingerprint=fingerprint)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(path, callback, fingerprint=fingerprint)
@@ -0,0 +1,135 @@
+"""Compact binary snapshot format（tasks.jsonの高速な代替保存形式）
+
+Layout（little-endian）::
+
+    magic    b"TODOSNP1"
+    header   <II  : n_strings, n_tasks
+    section  <I length + payload   x6
+        1. string lengths   uint32[n_strings]   （文字数、重複排除済みのid/name）
+        2. string blob      UTF-8               （全文字列を連結）
+        3. id index         uint32[n_tasks]
+        4. name index       uint32[n_tasks]
+        5. parent index     int32[n_tasks]      （pre-order、-1 = トップレベル）
+        6. flags            uint8[n_tasks]      （bit0 = completed）
+
+読み込みはファイル全体を1回readし、配列はmemoryview.castで直接参照する。
+"""
+import os
+import struct
+import sys
+from array import array
+from itertools import accumulate
+from typing import Dict, List
+
+MAGIC = b"TODOSNP1"
+_HEADER = struct.Struct("<II")
+_LEN = struct.Struct("<I")
+FLAG_COMPLETED = 0x01
+
+
+def _section(payload: bytes) -> bytes:
+    return _LEN.pack(len(payload)) + payload
+
+
+def _le(arr: array) -> bytes:
+    """arrayをlittle-endianのbytesに変換 """
+    if sys.byteorder != "little":
+        arr = array(arr.typecode, arr)
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def encode(tasks: List) -> bytes:
+    """タスクツリーをsnapshotのbytesに変換 """
+    strings: Dict[str, int] = {}
+    ids, names = array("I"), array("I")
+    parents, flags = array("i"), bytearray()
+    stack = [(t, -1) for t in reversed(tasks)]
+    while stack:
+        task, parent = stack.pop()
+        index = len(parents)
+        ids.append(strings.setdefault(task.id, len(strings)))
+        names.append(strings.setdefault(task.name, len(strings)))
+        parents.append(parent)
+        flags.append(FLAG_COMPLETED if task.completed else 0)
+        stack.extend((c, index) for c in reversed(task.subtasks))
+
+    table = list(strings)  # dictは挿入順 = index順
+    lengths = array("I", map(len, table))
+    blob = "".join(table).encode("utf-8")
+    return b"".join([
+        MAGIC,
+        _HEADER.pack(len(table), len(parents)),
+        _section(_le(lengths)),
+        _section(blob),
+        _section(_le(ids)),
+        _section(_le(names)),
+        _section(_le(parents)),
+        _section(bytes(flags)),
+    ])
+
+
+def decode(data: bytes, task_cls) -> List:
+    """snapshotのbytesからタスクツリーを復元 """
+    view = memoryview(data)
+    if view[:len(MAGIC)] != MAGIC:
+        raise ValueError("snapshotファイルではありません / not a task snapshot")
+    offset = len(MAGIC)
+    n_strings, n_tasks = _HEADER.unpack_from(view, offset)
+    offset += _HEADER.size
+
+    sections = []
+    for _ in range(6):
+        (length,) = _LEN.unpack_from(view, offset)
+        offset += _LEN.size
+        sections.append(view[offset:offset + length])
+        offset += length
+    raw_lengths, blob, raw_ids, raw_names, raw_parents, flags = sections
+
+    lengths, ids, names, parents = (_array(code, raw) for code, raw in
+                                    (("I", raw_lengths), ("I", raw_ids), ("I", raw_names), ("i", raw_parents)))
+    if len(lengths) != n_strings or not (len(ids) == len(names) == len(parents) == len(flags) == n_tasks):
+        raise ValueError("snapshotが壊れています / corrupted snapshot")
+
+    # blobを1回だけdecodeし、文字数のoffsetで切り出す
+    text = str(blob, "utf-8")
+    ends = list(accumulate(lengths))
+    table = [text[end - n:end] for n, end in zip(lengths, ends)]
+
+    # 位置引数 + 明示的なlistの方がdefault_factory経由より速い
+    nodes = [task_cls(table[i], table[n], bool(f & FLAG_COMPLETED), [])
+             for i, n, f in zip(ids, names, flags)]
+    roots = []
+    for node, parent in zip(nodes, parents):
+        if parent < 0:
+            roots.append(node)
+        else:
+            node.parent = nodes[parent]
+            node.parent.subtasks.append(node)
+    return roots
+
+
+def _array(typecode: str, raw: memoryview):
+    """little-endianの生bytesを数値配列として参照（可能ならcopyなし）"""
+    if sys.byteorder == "little":
+        return raw.cast(typecode)
+    arr = array(typecode, raw.tobytes())
+    arr.byteswap()
+    return arr
+
+
+def write(path: str, tasks: List) -> None:
+    """snapshotをatomicに書き込み """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(encode(tasks))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read(path: str, task_cls) -> List:
+    """snapshotを1回のbuffered readで読み込み """
+    with open(path, "rb") as f:
+        data = f.read()
+    return decode(data, task_cls)
@@ -0,0 +1,197 @@
+"""分解結果の解析：structured output（JSON）の逐次validatorと、番号付きリストのtext parser
+
+structured outputの形式：
+    {"subtasks": [{"title": "…", "estimate_minutes": 30, "order": 1}, ...]}
+itemは文字列だけでもよく、トップレベルがarrayだけの場合も受け付ける。
+"""
+import re
+import json
+from typing import List, NamedTuple, Optional
+
+SUBTASK_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "subtasks": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "title": {"type": "string"},
+                    "estimate_minutes": {"type": "integer", "minimum": 0},
+                    "order": {"type": "integer"},
+                },
+                "required": ["title"],
+            },
+        },
+    },
+    "required": ["subtasks"],
+}
+
+_DECODER = json.JSONDecoder()
+_SUBTASKS_KEY = re.compile(r'"subtasks"\s*:\s*\[')
+_WHITESPACE = re.compile(r"[\s,]*")
+_LIST_PREFIX = re.compile(r"^(?:[\d①-⑳]+[.)．、]|[-*・•])\s*")
+_FENCE = re.compile(r"^```")
+_CLOSERS = {"{": "}", '"': '"'}
+
+
+class SubtaskFormatError(ValueError):
+    """structured outputとして解析できない（text parserにfallbackする）"""
+
+
+class Subtask(NamedTuple):
+    title: str
+    estimate_minutes: Optional[int] = None
+    order: Optional[int] = None
+
+
+def _validate(item) -> Subtask:
+    """1 itemを検証してSubtaskに変換 """
+    if isinstance(item, str):
+        title = item.strip()
+        if not title:
+            raise SubtaskFormatError("空のサブタスク")
+        return Subtask(title)
+    if not isinstance(item, dict):
+        raise SubtaskFormatError(f"サブタスクがobjectではありません：{item!r}")
+    title = item.get("title", item.get("name"))
+    if not isinstance(title, str) or not title.strip():
+        raise SubtaskFormatError(f"titleがありません：{item!r}")
+    estimate = item.get("estimate_minutes")
+    if estimate is not None and (isinstance(estimate, bool) or not isinstance(estimate, (int, float)) or estimate < 0):
+        raise SubtaskFormatError(f"estimate_minutesが不正です：{estimate!r}")
+    order = item.get("order")
+    if order is not None and (isinstance(order, bool) or not isinstance(order, int)):
+        raise SubtaskFormatError(f"orderが不正です：{order!r}")
+    return Subtask(title.strip(), None if estimate is None else int(estimate), order)
+
+
+class SubtaskStreamParser:
+    """structured outputの逐次parser
+
+    feed()にchunkを渡すと、"subtasks" arrayの要素が完結するたびに検証済みのSubtaskを返す。
+    完結していない要素はbufferに残し、次のchunkで続きから解析する（全体を何度も解析し直さない）。
+    feed()は届いた順、close()はparse_structuredと同じくorder順で返す。
+    HttpBackendはまだstreamingのrequestを使っていないので、現在はbenchmarkからのみ使われる。
+    """
+
+    def __init__(self):
+        self._buf = ""
+        self._pos: Optional[int] = None  # array内の次の要素の位置（arrayの開始前はNone）
+        self._done = False
+        self.subtasks: List[Subtask] = []
+
+    def feed(self, chunk: str) -> List[Subtask]:
+        """chunkを追加し、新たに完結したサブタスクを返す """
+        if self._done:
+            return []
+        fresh = len(self._buf)  # このchunkで届いた部分の開始位置
+        self._buf += chunk
+        if self._pos is None and not self._find_array():
+            return []
+
+        added = []
+        buf = self._buf
+        while True:
+            pos = _WHITESPACE.match(buf, self._pos).end()
+            if pos >= len(buf):
+                break
+            if buf[pos] == "]":
+                self._done = True
+                break
+            # 要素を閉じる文字がまだ届いていなければ、decodeを試さない（chunkごとの再解析を避ける）
+            closer = _CLOSERS.get(buf[pos])
+            if closer and buf.find(closer, max(pos + 1, fresh)) < 0:
+                break
+            try:
+                item, end = _DECODER.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                break  # 要素がまだ届いていない（末尾以外の不正はclose()で検出）
+            added.append(_validate(item))
+            self._pos = end
+        # 解析済みの部分は捨てる（長い出力でもbufferの連結がO(n^2)にならない）
+        self._buf, self._pos = buf[self._pos:], 0
+        self.subtasks.extend(added)
+        return added
+
+    def _find_array(self) -> bool:
+        """"subtasks" array（またはトップレベルのarray）の開始位置を探す """
+        start = _WHITESPACE.match(self._buf).end()
+        head = self._buf[start:start + 3]
+        if head and len(head) < 3 and "```".startswith(head):
+            return False  # code fenceの途中まで
+        if _FENCE.match(self._buf, start):
+            # ```json … ``` で囲まれている場合は中身から
+            newline = self._buf.find("\n", start)
+            if newline < 0:
+                return False
+            start = _WHITESPACE.match(self._buf, newline + 1).end()
+        if start >= len(self._buf):
+            return False
+        if self._buf[start] == "[":
+            self._pos = start + 1
+            return True
+        if self._buf[start] != "{":
+            raise SubtaskFormatError("JSONではありません")
+        m = _SUBTASKS_KEY.search(self._buf, start)
+        if m is None:
+            return False
+        self._pos = m.end()
+        return True
+
+    def close(self) -> List[Subtask]:
+        """入力の終わり：arrayが閉じていることを確認して全サブタスクを返す（orderがあればその順）"""
+        if not self._done:
+            if self._pos is not None:
+                # 完結していない要素が残っている → その位置のエラーを報告
+                pos = _WHITESPACE.match(self._buf, self._pos).end()
+                try:
+                    _DECODER.raw_decode(self._buf, pos)
+                except json.JSONDecodeError as e:
+                    raise SubtaskFormatError(f"JSONが途中で終わっています：{e}") from e
+            raise SubtaskFormatError("subtasksのarrayが見つかりません")
+        if not self.subtasks:
+            raise SubtaskFormatError("サブタスクが空です")
+        return ordered(self.subtasks)
+
+
+def parse_structured(content: str) -> List[Subtask]:
+    """structured outputを一括で解析（orderがあればその順に並べる）
+
+    回答が揃っている場合はjson.loadsで一度に解析する（逐次parserはchunkで届く場合用）。
+    """
+    text = content.strip()
+    if _FENCE.match(text):
+        # ```json … ``` で囲まれている場合は中身から
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        text = text.rstrip()
+        if text.endswith("```"):
+            text = text[:-3]
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise SubtaskFormatError(f"JSONではありません：{e}") from e
+    if isinstance(data, dict):
+        data = data.get("subtasks")
+    if not isinstance(data, list):
+        raise SubtaskFormatError("subtasksのarrayが見つかりません")
+    if not data:
+        raise SubtaskFormatError("サブタスクが空です")
+    return ordered([_validate(item) for item in data])
+
+
+def ordered(subtasks: List[Subtask]) -> List[Subtask]:
+    """orderの指定があるものをその順に、ないものは元の順で後ろに """
+    return sorted(subtasks, key=lambda s: (s.order is None, s.order or 0))
+
+
+def parse_text(content: str) -> List[str]:
+    """番号付き / 箇条書きのtextを解析（structured outputでない場合のfallback）
+
+    番号や記号で始まる行があればそれだけを採用し、前後の説明文は無視する。
+    """
+    lines = [s.strip() for s in content.splitlines()]
+    lines = [s for s in lines if s and not _FENCE.match(s)]
+    listed = [_LIST_PREFIX.sub("", s, count=1) for s in lines if _LIST_PREFIX.match(s)]
+    items = listed if listed else lines
+    return [s for s in (item.strip() for item in items) if s and s[0] not in '{}[]"']
@@ -1,11 +1,21 @@
+import os
 import json
 import time
 import uuid
-import requests
+import contextlib
 import threading
-from typing import List, Optional, Dict, Any
+from typing import Callable, List, Optional, Dict, Any, Set, Tuple
 from dataclasses import dataclass, field
-from config import DEEPSEEK_API_KEY, DEEPSEEK_API_URL, DEEPSEEK_MODEL, TASK_DECOMPOSITION_PROMPT, TASKS_PATH
+from config import (DEEPSEEK_API_KEY, DEEPSEEK_API_URL, DEEPSEEK_MODEL, DECOMPOSE_POLICY, DECOMPOSE_STRUCTURED,
+                    TASKS_PATH, TASKS_FORMAT)
+from logic import snapshot
+from logic.backends import DecompositionError, HttpBackend, LocalBackend, parse_subtasks
+from logic.archive import Archive, is_fully_completed
+from logic.sharded_store import ShardedStore
+from logic.shared_store import FileLock, atomic_write_text, create_watcher, file_fingerprint
+
+# local_then_remote：local結果が編集済みのため、remoteの結果を反映しなかった場合のメッセージ
+REMOTE_DISCARDED = "サブタスクが編集済みのため、AIによる分解結果は反映しませんでした。"
 
 
 @dataclass
@@ -15,16 +25,65 @@ class Task:
     name: str
     completed: bool = False
     subtasks: List['Task'] = field(default_factory=list)
+    # 保存されていない変更を持つか（dirtyな子を持つタスクは必ずdirty）
+    dirty: bool = field(default=True, compare=False, repr=False)
+    parent: Optional['Task'] = field(default=None, compare=False, repr=False)
+    # to_json()の結果のcache：(level, JSON断片)。cleanな間だけ有効
+    _json: Optional[Tuple[int, str]] = field(default=None, compare=False, repr=False)
 
     @staticmethod
     def from_dict(data: Dict[str, Any]) -> 'Task':
         """辞書からタスクを作成 """
-        return Task(
+        task = Task(
             id=data["id"],
             name=data["name"],
             completed=data.get("completed", False),
             subtasks=[Task.from_dict(t) for t in data.get("subtasks", [])],
         )
+        for sub in task.subtasks:
+            sub.parent = task
+        return task
+
+    def add_subtask(self, task: 'Task') -> 'Task':
+        """サブタスクを追加（親リンクとdirtyフラグも更新）"""
+        task.parent = self
+        self.subtasks.append(task)
+        self.mark_dirty()
+        return task
+
+    def mark_dirty(self) -> None:
+        """自身と祖先をdirtyにし、JSON断片のcacheを破棄する """
+        node = self
+        while node is not None:
+            node.dirty = True
+            node._json = None
+            node = node.parent
+
+    def to_json(self, level: int = 0) -> str:
+        """json.dumps(self.to_dict(), ensure_ascii=False, indent=2) と同じ文字列を返す
+
+        level：このタスクが置かれるインデントの深さ（2スペース単位）。
+        変更のないsubtreeはcacheされた断片をそのまま使うので、encodeのコストは変更量に比例する。
+        """
+        if not self.dirty and self._json is not None and self._json[0] == level:
+            return self._json[1]
+        ind = "  " * (level + 1)
+        if self.subtasks:
+            item_ind = "  " * (level + 2)
+            children = ",\n".join(item_ind + t.to_json(level + 2) for t in self.subtasks)
+            subtasks = f"[\n{children}\n{ind}]"
+        else:
+            subtasks = "[]"
+        text = (
+            "{\n"
+            f"{ind}\"id\": {json.dumps(self.id, ensure_ascii=False)},\n"
+            f"{ind}\"name\": {json.dumps(self.name, ensure_ascii=False)},\n"
+            f"{ind}\"completed\": {'true' if self.completed else 'false'},\n"
+            f"{ind}\"subtasks\": {subtasks}\n"
+            f"{'  ' * level}}}"
+        )
+        self._json = (level, text)
+        return text
 
     def to_dict(self) -> Dict[str, Any]:
         """タスクを辞書に変換 """
@@ -35,11 +94,86 @@ class Task:
             "subtasks": [t.to_dict() for t in self.subtasks],
         }
 
+
+def _flatten(tasks: List[Task]) -> Dict[str, Tuple[str, bool, Optional[str]]]:
+    """ツリーを {id: (name, completed, parent_id)} に平坦化（pre-order、親が先）"""
+    flat: Dict[str, Tuple[str, bool, Optional[str]]] = {}
+    stack = [(t, None) for t in reversed(tasks)]
+    while stack:
+        t, parent_id = stack.pop()
+        flat[t.id] = (t.name, t.completed, parent_id)
+        stack.extend((c, t.id) for c in reversed(t.subtasks))
+    return flat
+
+
+def _encode_tasks(tasks: List[Task]) -> str:
+    """{"tasks": [...]} をindent=2のJSONに変換（各タスクのcache済み断片をつなぎ合わせる）"""
+    if not tasks:
+        return '{\n  "tasks": []\n}'
+    body = ",\n".join("    " + t.to_json(2) for t in tasks)
+    return '{\n  "tasks": [\n' + body + '\n  ]\n}'
+
+
+def _mark_clean(tasks: List[Task]) -> None:
+    """dirtyなノードのみを辿ってフラグをクリア（cleanなノードの子孫はすべてclean）
+
+    外部で組み立てられたツリーでもdirtyの伝播が効くように、辿ったノードの親リンクも張り直す。
+    """
+    stack = [t for t in tasks if t.dirty]
+    while stack:
+        t = stack.pop()
+        t.dirty = False
+        for c in t.subtasks:
+            c.parent = t
+            if c.dirty:
+                stack.append(c)
+
+
+def _walk(tasks: List[Task]):
+    """ツリーのすべてのノードを走査 """
+    stack = list(tasks)
+    while stack:
+        t = stack.pop()
+        yield t
+        stack.extend(t.subtasks)
+
+
 class TaskManager:
     """Task manager：メモリ + JSON保存 + 分解API呼び出し """
-    def __init__(self):
+    def __init__(self, path: str = TASKS_PATH, fmt: str = TASKS_FORMAT):
+        if fmt not in ("json", "snapshot", "sharded"):
+            raise ValueError(f"未対応の保存形式：{fmt}")
+        self.format = fmt
+        self.json_path = path  # snapshot/shardedモードではstoreがない場合の移行元（以後は更新しない）
+        stem = os.path.splitext(path)[0]
+        self._shards = ShardedStore(f"{stem}.d")
+        self.path = {"json": path, "snapshot": f"{stem}.snap", "sharded": self._shards.manifest_path}[fmt]
         self.tasks: List[Task] = []
         self._lock = threading.Lock()  # thread安全のためのロック 
+        self.version = 0  # 変更のたびに増える（HTTP serviceのETag / change feed用）
+        self.epoch = uuid.uuid4().hex[:12]  # processごとに異なる値（再起動後に古いETagと一致させない）
+        self._version_changed = threading.Condition(self._lock)
+        self._store_lock = FileLock(f"{path}.lock")  # プロセス間のadvisory lock
+        self._disk_fingerprint = None  # 最後に同期したファイルのfingerprint
+        self._base: Dict[str, Tuple[str, bool, Optional[str]]] = {}  # 3-way mergeの基準（最後に同期したdisk内容）
+        self._removed: List[Task] = []  # 前回のsave以降にstoreから外したトップレベルのタスク
+        self._watcher = None
+        # save()が上書き前に取り込んだ外部変更（watcherのcallbackでon_changeに渡す）
+        self._unnotified_ids: Set[str] = set()
+        self._unnotified_structural = False
+        self.archive = Archive(os.path.join(os.path.dirname(os.path.abspath(path)), "archive"))
+        # 分解backend：remote（OpenAI互換API）+ local（過去の分解から学習したtemplate）
+        self.remote_backend = HttpBackend(DEEPSEEK_API_KEY, DEEPSEEK_API_URL, DEEPSEEK_MODEL,
+                                          structured=DECOMPOSE_STRUCTURED)
+        self.local_backend = LocalBackend(lambda: self.tasks)
+        self.decompose_policy = DECOMPOSE_POLICY
+        if self.decompose_policy == "auto":
+            # local_then_remoteはopt-in（API Keyがあれば従来どおりremoteのみ）
+            self.decompose_policy = "remote" if self.remote_backend.available else "local"
+        self._batch_depth = 0  # batch()のネスト数 
+        self._save_pending = False  # batch中に保留されたsaveの有無
+        # perf overlay用の計測値（ms）
+        self.stats: Dict[str, Any] = {"save_ms": None, "load_ms": None, "saves": 0, "decompose_in_flight": 0}
         self.load()  # diskから読み込みを試行 
 
     # ---------- 基本のCRUD操作  ----------
@@ -47,13 +181,16 @@ class TaskManager:
         """globally uniqueなIDを生成 """
         return str(uuid.uuid4())
 
-    def add_task(self, name: str) -> Task:
-        """新しいタスクを追加 """
+    def add_task(self, name: str, parent: Optional[Task] = None, completed: bool = False,
+                 task_id: Optional[str] = None) -> Task:
+        """新しいタスクを追加（parent未指定の場合はトップレベル）"""
         with self._lock:
-            task = Task(id=self._new_id(), name=name)
-            # 常にトップレベルに追加
-            self.tasks.append(task)
-            self.save()
+            task = Task(id=task_id or self._new_id(), name=name, completed=completed)
+            if parent:
+                parent.add_subtask(task)
+            else:
+                self.tasks.append(task)
+            self._persist()
             return task
 
     def find_task(self, task_id: str) -> Optional[Task]:
@@ -75,7 +212,8 @@ class TaskManager:
             task = self.find_task(task_id)
             if task:
                 task.completed = not task.completed
-                self.save()
+                task.mark_dirty()
+                self._persist()
                 return True
             return False
 
@@ -83,114 +221,379 @@ class TaskManager:
         """すべてのタスクを取得 """
         return self.tasks
 
+    def update_task(self, task_id: str, name: Optional[str] = None, completed: Optional[bool] = None) -> bool:
+        """タスクの名前/完了状態を変更 """
+        with self._lock:
+            task = self.find_task(task_id)
+            if not task:
+                return False
+            if name is not None:
+                task.name = name
+            if completed is not None:
+                task.completed = completed
+            task.mark_dirty()
+            self._persist()
+            return True
+
+    # ---------- 変更の通知（HTTP service用） ----------
+    def export_json(self, task_id: Optional[str] = None) -> Tuple[int, Optional[str]]:
+        """(version, tasks.jsonと同じ形式のJSON) を一貫した状態で返す。task_id指定時はそのタスクのみ """
+        with self._lock:
+            if task_id is None:
+                return self.version, _encode_tasks(self.tasks)
+            task = self.find_task(task_id)
+            return self.version, (task.to_json() if task else None)
+
+    def wait_for_change(self, since: int, timeout: float) -> int:
+        """versionがsinceと異なるまで最大timeout秒待ち、現在のversionを返す（long-poll用）
+
+        serviceの再起動でversionが戻った場合もすぐに返るよう、大小ではなく一致で判定する。
+        """
+        with self._lock:
+            self._version_changed.wait_for(lambda: self.version != since, timeout)
+            return self.version
+
+    def _bump_version(self) -> None:
+        """versionを進めて待機中のclientを起こす（self._lockを保持して呼ぶ）"""
+        self.version += 1
+        self._version_changed.notify_all()
+
     def delete_task(self, task_id: str) -> bool:
         """トップレベル（母プロジェクト）のみ削除。子タスクは削除不可。成功時Trueを返す"""
         with self._lock:
             for i, t in enumerate(self.tasks):
                 if t.id == task_id:
-                    self.tasks.pop(i)
-                    self.save()
+                    self._removed.append(self.tasks.pop(i))
+                    self._persist()
                     return True
             return False
 
+    # ---------- Archive（cold storage） ----------
+    def archive_tasks(self, task_ids: List[str]) -> int:
+        """トップレベルのプロジェクトをarchiveに移動し、移動した件数を返す """
+        with self._lock:
+            wanted = set(task_ids)
+            moving = [t for t in self.tasks if t.id in wanted]
+            if not moving:
+                return 0
+            # 先にarchiveへ書き込んでからstoreから外す（途中で落ちても失われない）
+            self.archive.add(moving)
+            self.tasks = [t for t in self.tasks if t.id not in wanted]
+            self._removed.extend(moving)
+            self._persist()
+            return len(moving)
+
+    def auto_archive(self) -> int:
+        """完了済みのプロジェクトをまとめてarchive（ユーザーが復元したものは除く）
+
+        古い（長期間変更のない）プロジェクトは対象外：タスクは作成/更新日時を保存していないため。
+        """
+        with self._lock:
+            done_ids = [t.id for t in self.tasks
+                        if is_fully_completed(t) and not self.archive.was_restored(t.id)]
+        return self.archive_tasks(done_ids) if done_ids else 0
+
+    def get_archived_tasks(self) -> List[Dict[str, Any]]:
+        """archive済みプロジェクトの一覧（indexのみ、shardは読まない）"""
+        with self._lock:
+            return self.archive.entries()
+
+    def load_archived_task(self, task_id: str) -> Optional[Task]:
+        """archive済みプロジェクトの中身を読み込む（閲覧用、storeには戻さない）"""
+        with self._lock:
+            return self.archive.load(task_id, Task)
+
+    def restore_task(self, task_id: str) -> Optional[Task]:
+        """archiveからプロジェクトを復元してトップレベルに戻す """
+        with self._lock:
+            task = self.archive.load(task_id, Task)
+            if task is None:
+                return None
+            # 先にstoreへ保存してからarchiveから外す（archive_tasksと逆の順序）
+            if not any(t.id == task.id for t in self.tasks):
+                self.tasks.append(task)
+                self._persist()
+            self.archive.remove(task_id, Task)
+            return task
+
     # ---------- データの永続化  ----------
+    @contextlib.contextmanager
+    def batch(self):
+        """ブロック内の変更をまとめて1回のsaveでcommitする（bulk import用）"""
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                if self._batch_depth == 0 and self._save_pending:
+                    self.save()
+
+    def _persist(self) -> None:
+        """変更をdiskに反映。batch中はblock終了時まで保留（self._lockを保持して呼ぶ）"""
+        self._bump_version()
+        if self._batch_depth:
+            self._save_pending = True
+        else:
+            self.save()
+
+    def _read_disk(self, path: Optional[str] = None) -> List[Task]:
+        """diskから読み込んでTaskリストを返す（ロックは呼び出し側で取得）"""
+        path = path or self.path
+        if self.format == "snapshot" and path == self.path:
+            return snapshot.read(path, Task)
+        if self.format == "sharded" and path == self.path:
+            return self._shards.read(Task)
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return [Task.from_dict(t) for t in data.get("tasks", [])]
+
+    def _fingerprint(self):
+        """storeの変更検知用fingerprint（shardedモードはmanifestと全shard）"""
+        if self.format == "sharded":
+            return self._shards.fingerprint()
+        return file_fingerprint(self.path)
+
+    def _write_disk(self) -> None:
+        """現在のタスクを保存形式に従って書き込み（ロックは呼び出し側で取得）"""
+        if self.format == "snapshot":
+            snapshot.write(self.path, self.tasks)
+        elif self.format == "sharded":
+            self._shards.write(self.tasks)
+        else:
+            atomic_write_text(self.path, _encode_tasks(self.tasks))
+
     def load(self) -> None:
-        """JSONファイルからタスクを読み込み / Load tasks from JSON file"""
+        """保存ファイルからタスクを読み込み / Load tasks from the store file"""
+        started = time.perf_counter()
+        with self._store_lock:
+            source = self.path
+            if self.format != "json" and not os.path.exists(self.path) and os.path.exists(self.json_path):
+                # 移行はstoreがまだ存在しない場合のみ（以後tasks.jsonは読まない。空/古いtasks.jsonで上書きしない）
+                source = self.json_path
+            migrated = False
+            try:
+                self.tasks = self._read_disk(source)
+                migrated = source != self.path
+            except FileNotFoundError:
+                self.tasks = []  # ファイルが存在しない場合は空のリスト 
+            except Exception:
+                # 解析失敗時は安全に降格：古いファイルを無視 
+                self.tasks = []
+            if migrated:
+                self._write_disk()  # 移行：すべてのノードがdirtyなので全体を書き込む 
+            _mark_clean(self.tasks)
+            self._removed.clear()
+            self._base = _flatten(self.tasks)
+            self._disk_fingerprint = self._fingerprint()
+        self.stats["load_ms"] = (time.perf_counter() - started) * 1000
+
+    def save(self) -> None:
+        """タスクを保存ファイルに保存 / Save tasks to the store file"""
+        started = time.perf_counter()
+        with self._store_lock:
+            # 前回の同期以降に他のwriterが書き込んでいたら、上書きする前に取り込む
+            fingerprint = self._fingerprint()
+            if fingerprint is None:
+                # ファイルが消えている：差分ではなく全体を書き直す
+                for t in self.tasks:
+                    t.mark_dirty()
+            elif fingerprint != self._disk_fingerprint:
+                changes = self._merge_from_disk()
+                if changes and self._watcher:
+                    # 自分の書き込みでwatcherが発火するので、そのcallbackで通知する
+                    self._unnotified_ids |= changes[0]
+                    self._unnotified_structural |= changes[1]
+            self._write_disk()
+            self._sync_base()
+            _mark_clean(self.tasks)
+            self._disk_fingerprint = self._fingerprint()
+            self._save_pending = False
+        self.stats["save_ms"] = (time.perf_counter() - started) * 1000
+        self.stats["saves"] += 1
+
+    def _sync_base(self) -> None:
+        """書き込んだ内容に合わせてmerge基準を更新（dirtyなノードと外したタスクのみ走査）"""
+        for removed in self._removed:
+            for t in _walk([removed]):
+                self._base.pop(t.id, None)
+        self._removed.clear()
+        stack = [(t, None) for t in self.tasks if t.dirty]
+        while stack:
+            t, parent_id = stack.pop()
+            self._base[t.id] = (t.name, t.completed, parent_id)
+            stack.extend((c, t.id) for c in t.subtasks if c.dirty)
+
+    # ---------- 共有ストア（外部変更の取り込み） ----------
+    def start_watching(self, on_change: Callable[[Set[str], bool], None]) -> None:
+        """TASKS_PATHの監視を開始。外部変更をmergeした後 on_change(changed_ids, structural) を呼ぶ
+
+        on_changeはwatcher threadから呼ばれる。structural=Trueの場合はタスクの追加/削除を含む。
+        save()が書き込み前にmergeした外部変更も、その書き込みによるイベントで通知する。
+        """
+        if self._watcher:
+            return
+
+        def on_file_event():
+            with self._lock:
+                changed, structural = self._unnotified_ids, self._unnotified_structural
+                self._unnotified_ids, self._unnotified_structural = set(), False
+                with self._store_lock:
+                    changes = None
+                    if self._fingerprint() != self._disk_fingerprint:
+                        changes = self._merge_from_disk()
+                if changes and (changes[0] or changes[1]):
+                    self._bump_version()  # save()経由のmergeは書き込み時にversionが進んでいる
+                    changed |= changes[0]
+                    structural |= changes[1]
+            if changed or structural:
+                on_change(changed, structural)
+
+        fingerprint = self._fingerprint if self.format == "sharded" else None
+        self._watcher = create_watcher(self.path, on_file_event, fingerprint)
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        """ファイル監視を停止 """
+        if self._watcher:
+            self._watcher.stop()
+            self._watcher = None
+
+    def _merge_from_disk(self) -> Optional[Tuple[Set[str], bool]]:
+        """diskの内容を3-way mergeでメモリ上のツリーに取り込む（self._store_lockを保持して呼ぶ）
+
+        基準（前回同期時の内容）と比べて他のwriterが変更した部分のみ適用し、ローカルの変更は保持する。
+        (変更されたタスクID, 構造変更の有無) を返す。読み込めない場合はNone。
+        ファイルが存在しない場合（同期ツールによる削除→再作成の途中など）も削除とは見なさずNoneを返す。
+        """
         try:
-            with open(TASKS_PATH, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            self.tasks = [Task.from_dict(t) for t in data.get("tasks", [])]
-        except FileNotFoundError:
-            self.tasks = []  # ファイルが存在しない場合は空のリスト 
+            theirs = _flatten(self._read_disk())
         except Exception:
-            # 解析失敗時は安全に降格：古いファイルを無視 
-            self.tasks = []
+            return None  # 存在しない/書きかけ/壊れたファイル：次のイベントで再試行 
+        base = self._base
+        index: Dict[str, Tuple[Task, Optional[Task]]] = {}
+        stack = [(t, None) for t in self.tasks]
+        while stack:
+            t, parent = stack.pop()
+            index[t.id] = (t, parent)
+            stack.extend((c, t) for c in t.subtasks)
 
-    def save(self) -> None:
-        """タスクをJSONファイルに保存 / Save tasks to JSON file"""
-        data = {"tasks": [t.to_dict() for t in self.tasks]}
-        with open(TASKS_PATH, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        changed: Set[str] = set()
+        structural = False
+        # 1. 外部で削除されたタスク 
+        for tid in base.keys() - theirs.keys():
+            if tid in index:
+                node, parent = index.pop(tid)
+                siblings = parent.subtasks if parent else self.tasks
+                if any(s is node for s in siblings):
+                    siblings[:] = [s for s in siblings if s is not node]
+                    if parent:
+                        parent.mark_dirty()
+                    structural = True
+        # 2. 外部で追加されたタスク（pre-orderなので親が先に作られる）
+        for tid, (name, completed, parent_id) in theirs.items():
+            if tid in base or tid in index:
+                continue
+            parent = index[parent_id][0] if parent_id in index else None
+            if parent_id and parent is None:
+                continue  # 親がローカルで削除済み 
+            node = Task(id=tid, name=name, completed=completed)
+            if parent:
+                parent.add_subtask(node)
+            else:
+                self.tasks.append(node)
+            index[tid] = (node, parent)
+            structural = True
+        # 3. 外部で変更されたフィールド 
+        for tid in theirs.keys() & base.keys():
+            if theirs[tid][:2] != base[tid][:2] and tid in index:
+                node = index[tid][0]
+                node.name, node.completed = theirs[tid][:2]
+                node.mark_dirty()
+                changed.add(tid)
 
-    # ---------- タスク分解（非同期 + retry + エラー情報） ----------
+        self._base = theirs
+        self._disk_fingerprint = self._fingerprint()
+        return changed, structural
+
+    # ---------- タスク分解（非同期 + backend + local fallback） ----------
     def decompose_task(self, task_id: str, callback=None) -> None:
-        """DeepSeekを呼び出して指定されたタスクをサブタスクに分解 """
+        """指定されたタスクをサブタスクに分解 
+
+        policy（DECOMPOSE_POLICY）:
+          remote             HTTP backendのみ（従来の動作）
+          local              local backendのみ（オフライン、即時）
+          local_then_remote  localの結果をすぐ反映し、remoteの結果が届いたら置き換える
+        callback(success, error) は結果が反映されるたびに呼ばれる（local_then_remoteでは最大2回）。
+        local結果が編集済みでremoteの結果を捨てた場合は、2回目が (False, REMOTE_DISCARDED)。
+        """
         task = self.find_task(task_id)
         if not task:
             if callback:
                 callback(False, "選択されたタスクが存在しません。")  # Selected task doesn't exist
             return
+        task_name = task.name
+        policy = self.decompose_policy
 
         def worker():
             """ Background worker 関数"""
-            # Quick fail：API Keyが不足 
-            if not DEEPSEEK_API_KEY:
-                if callback:
-                    callback(False, "API Keyが設定されていません（環境変数DEEPSEEK_API_KEYを設定してください）。")
-                return
+            try:
+                run()
+            finally:
+                with self._lock:
+                    self.stats["decompose_in_flight"] -= 1
 
-            headers = {
-                "Authorization": f"Bearer {DEEPSEEK_API_KEY}",
-                "Content-Type": "application/json"
-            }
-            prompt = TASK_DECOMPOSITION_PROMPT.format(task_name=task.name)
-            payload = {
-                "model": DEEPSEEK_MODEL,
-                "messages": [
-                    {"role": "system", "content": "あなたは役立つアシスタントです。与えられたタスクをサブタスクのリストに分解し、必ず日本語で回答してください。回答は必ず数字で始まる箇条書きの形式で、余計な説明は不要です。"},
-                    {"role": "user", "content": prompt}
-                ],
-                "stream": False
-            }
-
-            last_error = None
-            for attempt in range(3):  # 最大3回retries 
-                try:
-                    resp = requests.post(DEEPSEEK_API_URL, headers=headers, json=payload, timeout=30)
-                    resp.raise_for_status()
-                    content = resp.json()["choices"][0]["message"]["content"]
-                    subtasks = self._parse_subtasks(content)
-                    with self._lock:
-                        for name in subtasks:
-                            if name:
-                                task.subtasks.append(Task(id=self._new_id(), name=name))
-                        self.save()
-                    if callback:
-                        callback(True, None)
+        def run():
+            local_ids = None
+            if policy in ("local", "local_then_remote"):
+                with self._lock:
+                    names = self.local_backend.decompose(task_name)
+                local_ids, error = self._apply_subtasks(task_id, names)
+                if callback:
+                    callback(local_ids is not None, error)
+                if policy == "local" or local_ids is None:
                     return
-                except requests.RequestException as e:
-                    last_error = f"ネットワーク/リクエストエラー：{e}"  # Network/request error
-                except (KeyError, ValueError) as e:
-                    last_error = f"レスポンス解析失敗：{e}"  
-                # 指数backoff 
-                time.sleep(2 ** attempt)
 
-            if callback:
-                callback(False, last_error or "未知のエラー")  
+            try:
+                names = self.remote_backend.decompose(task_name)
+            except DecompositionError as e:
+                # local結果がある場合はそのまま残す（upgradeしないだけ）
+                if local_ids is None and callback:
+                    callback(False, str(e))
+                return
+            applied, error = self._apply_subtasks(task_id, names, replace_ids=local_ids)
+            if callback and (applied is not None or local_ids is None or error == REMOTE_DISCARDED):
+                callback(applied is not None, error)
 
+        with self._lock:
+            self.stats["decompose_in_flight"] += 1
         threading.Thread(target=worker, daemon=True).start()
 
+    def _apply_subtasks(self, task_id: str, names: List[str],
+                        replace_ids: Optional[List[str]] = None) -> Tuple[Optional[List[str]], Optional[str]]:
+        """分解結果をタスクに追加し、(追加したID, エラー) を返す
+
+        replace_ids：置き換え対象のlocal結果。ユーザーが既に手を加えている場合は置き換えない（(None, REMOTE_DISCARDED)）。
+        """
+        with self._lock:
+            # workerの実行中に削除/archiveされている可能性があるのでlock内で探し直す
+            task = self.find_task(task_id)
+            if not task:
+                return None, "選択されたタスクが存在しません。"
+            if not any(names):
+                return None, "サブタスクを取得できませんでした。"
+            if replace_ids is not None:
+                untouched = ([t.id for t in task.subtasks] == replace_ids
+                             and not any(t.completed or t.subtasks for t in task.subtasks))
+                if not untouched:
+                    return None, REMOTE_DISCARDED
+                task.subtasks = []
+                task.mark_dirty()
+            added = [task.add_subtask(Task(id=self._new_id(), name=name)).id for name in names if name]
+            self._persist()
+            return added, None
+
     def _parse_subtasks(self, content: str) -> List[str]:
         """サブタスクを解析 / Parse subtasks"""
-        # まずJSONを試し、次に"1. …"行で解析 
-        try:
-            data = json.loads(content)
-            if isinstance(data, dict) and "subtasks" in data and isinstance(data["subtasks"], list):
-                return [str(x).strip() for x in data["subtasks"] if str(x).strip()]
-            if isinstance(data, list):
-                return [str(x).strip() for x in data if str(x).strip()]
-        except json.JSONDecodeError:
-            pass
-
-        lines = []
-        for raw in content.splitlines():
-            s = raw.strip()
-            if not s:
-                continue
-            # プレフィックス "1. " / "1)" / "① " などの一般的な番号を削除 
-            s = s.lstrip("・").replace(")", ".")
-            import re
-            s = re.sub(r"^[\d①-⑳]+\.\s*", "", s)
-            if s and s[0] not in "{}[]":
-                lines.append(s)
-        return lines
\ No newline at end of file
+        return parse_subtasks(content)
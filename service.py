@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""Headless service：TaskManagerをlocal HTTP/JSONで公開する
+
+    python service.py [--host 127.0.0.1] [--port 8765] [--store PATH]
+
+    GET    /tasks                    タスク一覧（tasks.jsonと同じ形式、ETag / If-None-Match対応）
+    POST   /tasks                    追加：{"name", "parent"?, "completed"?} または {"tasks": [...]}（1回のsave）
+    GET    /tasks/<id>               1件取得
+    PATCH  /tasks/<id>               変更：{"name"?, "completed"?}
+    DELETE /tasks/<id>               トップレベルのタスクを削除
+    POST   /tasks/<id>/toggle        完了状態を切り替え
+    POST   /tasks/<id>/decompose     分解（?wait=1 で最初の結果まで待つ）
+    GET    /changes?since=V          long-poll：versionがVと異なるまで待つ（?timeout=秒）
+    GET    /archive                  archive一覧
+    GET    /archive/<id>             archive済みプロジェクトの中身
+    POST   /archive                  archive：{"ids": [...]} または {"completed": true}
+    POST   /archive/<id>/restore     復元
+
+versionは "<process epoch>-<連番>"（ETagはその引用符付き）。serviceを再起動すると古いversionとは一致しない。
+書き込みはIf-Match（ETag）を指定すると、versionが一致しない場合に412を返す。
+"""
+import os
+import re
+import sys
+import json
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import TASKS_PATH
+from logic.task_manager import TaskManager
+
+DEFAULT_PORT = 8765
+MAX_LONG_POLL = 60
+
+
+def _check_task_fields(data: dict, require_name: bool) -> None:
+    """タスクのfieldの型を検証（不正ならValueError → 400）"""
+    if require_name or "name" in data:
+        name = data.get("name")
+        if not isinstance(name, str) or not name.strip():
+            raise ValueError("nameは空でない文字列である必要があります")
+    if data.get("completed") is not None and not isinstance(data["completed"], bool):
+        raise ValueError("completedはtrue/falseである必要があります")
+    if data.get("parent") is not None and not isinstance(data["parent"], str):
+        raise ValueError("parentはタスクIDの文字列である必要があります")
+
+
+class TaskServiceHandler(BaseHTTPRequestHandler):
+    """1 request = 1 thread（ThreadingHTTPServer）。書き込みはserver.write_lockで直列化 """
+
+    protocol_version = "HTTP/1.1"
+    routes = [
+        ("GET", r"/tasks", "list_tasks"),
+        ("POST", r"/tasks", "create_tasks"),
+        ("GET", r"/tasks/(?P<id>[^/]+)", "get_task"),
+        ("PATCH", r"/tasks/(?P<id>[^/]+)", "update_task"),
+        ("DELETE", r"/tasks/(?P<id>[^/]+)", "delete_task"),
+        ("POST", r"/tasks/(?P<id>[^/]+)/toggle", "toggle_task"),
+        ("POST", r"/tasks/(?P<id>[^/]+)/decompose", "decompose_task"),
+        ("GET", r"/changes", "changes"),
+        ("GET", r"/archive", "list_archive"),
+        ("GET", r"/archive/(?P<id>[^/]+)", "get_archived"),
+        ("POST", r"/archive", "archive_tasks"),
+        ("POST", r"/archive/(?P<id>[^/]+)/restore", "restore_task"),
+    ]
+    _compiled = [(m, re.compile(f"^{p}$"), h) for m, p, h in routes]
+
+    @property
+    def manager(self) -> TaskManager:
+        return self.server.manager
+
+    # ---------- dispatch ----------
+    def _dispatch(self, method: str) -> None:
+        url = urlparse(self.path)
+        self.query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        allowed = False
+        for route_method, pattern, handler in self._compiled:
+            m = pattern.match(url.path)
+            if not m:
+                continue
+            allowed = True
+            if route_method != method:
+                continue
+            kwargs = {k: unquote(v) for k, v in m.groupdict().items()}
+            try:
+                getattr(self, handler)(**kwargs)
+            except (ValueError, KeyError, TypeError) as e:
+                self._send_error(400, f"不正なリクエスト：{e}")
+            return
+        self._send_error(405 if allowed else 404, "method not allowed" if allowed else "not found")
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PATCH(self):
+        self._dispatch("PATCH")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    # ---------- helpers ----------
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        data = json.loads(self.rfile.read(length).decode("utf-8"))
+        if not isinstance(data, dict):
+            raise ValueError("bodyはJSON objectである必要があります")
+        return data
+
+    def _send(self, status: int, body: str = "", version=None) -> None:
+        data = body.encode("utf-8")
+        self.send_response(status)
+        if version is not None:
+            self.send_header("ETag", f'"{self._tag(version)}"')
+        if data:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        if data:
+            self.wfile.write(data)
+
+    def _send_json(self, status: int, payload, version=None) -> None:
+        self._send(status, json.dumps(payload, ensure_ascii=False), version)
+
+    def _send_error(self, status: int, message: str) -> None:
+        self._send_json(status, {"error": message})
+
+    def _tag(self, version: int) -> str:
+        """外部に見せるversion（processのepoch付き）"""
+        return f"{self.manager.epoch}-{version}"
+
+    def _not_modified(self, version: int) -> bool:
+        """If-None-Matchが現在のversionと一致すれば304を返す """
+        if self.headers.get("If-None-Match") == f'"{self._tag(version)}"':
+            self._send(304, version=version)
+            return True
+        return False
+
+    def _write(self, fn):
+        """書き込み：If-Matchの確認と実行をwrite_lock内で行う """
+        with self.server.write_lock:
+            expected = self.headers.get("If-Match")
+            if expected and expected != f'"{self._tag(self.manager.version)}"':
+                self._send_error(412, "versionが一致しません / version mismatch")
+                return
+            result = fn()
+        return result if result is not None else True
+
+    # ---------- tasks ----------
+    def list_tasks(self):
+        version, body = self.manager.export_json()
+        if not self._not_modified(version):
+            self._send(200, body, version)
+
+    def get_task(self, id):
+        version, body = self.manager.export_json(id)
+        if body is None:
+            self._send_error(404, "タスクが存在しません")
+        elif not self._not_modified(version):
+            self._send(200, body, version)
+
+    def create_tasks(self):
+        data = self._read_json()
+        items = data["tasks"] if "tasks" in data else [data]
+        if not isinstance(items, list) or not all(isinstance(i, dict) for i in items):
+            raise ValueError("各タスクは {\"name\": 文字列, ...} のobjectである必要があります")
+        for item in items:
+            _check_task_fields(item, require_name=True)
+
+        def create():
+            # 先にすべての親を確認し、1件でも不正なら何も追加しない（all-or-nothing）
+            parents = []
+            for item in items:
+                parent = self.manager.find_task(item["parent"]) if item.get("parent") else None
+                if item.get("parent") and parent is None:
+                    raise ValueError(f"親タスクが存在しません：{item['parent']}")
+                parents.append(parent)
+            # 複数件でもsaveは1回
+            with self.manager.batch():
+                return [self.manager.add_task(item["name"], parent=parent, completed=item.get("completed") or False)
+                        for item, parent in zip(items, parents)]
+
+        created = self._write(create)
+        if created is None:
+            return  # 412は送信済み
+        self._send_json(201, {"version": self._tag(self.manager.version), "tasks": [t.to_dict() for t in created]},
+                        self.manager.version)
+
+    def update_task(self, id):
+        data = self._read_json()
+        _check_task_fields(data, require_name=False)
+        ok = self._write(lambda: self.manager.update_task(id, name=data.get("name"), completed=data.get("completed")))
+        self._respond_write(ok)
+
+    def delete_task(self, id):
+        self._respond_write(self._write(lambda: self.manager.delete_task(id)))
+
+    def toggle_task(self, id):
+        self._respond_write(self._write(lambda: self.manager.toggle_task_completion(id)))
+
+    def _respond_write(self, ok) -> None:
+        if ok is None:
+            return  # 412は送信済み
+        if ok:
+            self._send_json(200, {"version": self._tag(self.manager.version)}, self.manager.version)
+        else:
+            self._send_error(404, "タスクが存在しません")
+
+    def decompose_task(self, id):
+        if self.manager.find_task(id) is None:
+            self._send_error(404, "タスクが存在しません")
+            return
+        done = threading.Event()
+        result = {}
+
+        def on_complete(success, error):
+            if not done.is_set():
+                result.update(ok=success, error=error)
+                done.set()
+
+        self.manager.decompose_task(id, on_complete)
+        if self.query.get("wait") != "1":
+            self._send_json(202, {"accepted": True})
+            return
+        done.wait(self.manager.remote_backend.timeout * self.manager.remote_backend.retries + 10)
+        if not result:
+            self._send_error(504, "分解がtimeoutしました")
+            return
+        self._send_json(200 if result["ok"] else 502, {"version": self._tag(self.manager.version), **result},
+                        self.manager.version)
+
+    # ---------- change feed ----------
+    def changes(self):
+        epoch, _, number = self.query.get("since", "").partition("-")
+        # 別のprocess（再起動前）のversionは常に古いものとして扱い、すぐに返す
+        since = int(number) if epoch == self.manager.epoch and number.isdigit() else -1
+        timeout = min(float(self.query.get("timeout", 25)), MAX_LONG_POLL)
+        version = self.manager.wait_for_change(since, timeout)
+        self._send_json(200, {"version": self._tag(version)}, version)
+
+    # ---------- archive ----------
+    def list_archive(self):
+        self._send_json(200, {"entries": self.manager.get_archived_tasks()})
+
+    def get_archived(self, id):
+        task = self.manager.load_archived_task(id)
+        if task is None:
+            self._send_error(404, "archiveに存在しません")
+        else:
+            self._send(200, task.to_json())
+
+    def archive_tasks(self):
+        data = self._read_json()
+        completed, ids = data.get("completed"), data.get("ids")
+        if completed is not None and not isinstance(completed, bool):
+            raise ValueError("completedはtrue/falseである必要があります")
+        if completed:
+            count = self._write(self.manager.auto_archive)
+        elif isinstance(ids, list) and all(isinstance(i, str) for i in ids):
+            count = self._write(lambda: self.manager.archive_tasks(ids))
+        else:
+            raise ValueError("idsはタスクIDの文字列のarrayである必要があります")
+        if count is not None:
+            self._send_json(200, {"archived": int(count), "version": self._tag(self.manager.version)}, self.manager.version)
+
+    def restore_task(self, id):
+        task = self._write(lambda: self.manager.restore_task(id) or False)
+        if task is None:
+            return
+        if task is False:
+            self._send_error(404, "archiveに存在しません")
+        else:
+            self._send(200, task.to_json(), self.manager.version)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def make_server(manager: TaskManager, host: str = "127.0.0.1", port: int = DEFAULT_PORT,
+                verbose: bool = False) -> ThreadingHTTPServer:
+    """TaskManagerを公開するHTTP serverを作成（serve_foreverは呼び出し側で）"""
+    server = ThreadingHTTPServer((host, port), TaskServiceHandler)
+    server.daemon_threads = True
+    server.manager = manager
+    server.write_lock = threading.Lock()
+    server.verbose = verbose
+    return server
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Todo headless HTTP service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--store", default=TASKS_PATH, help="tasks.jsonのパス（default: TASKS_PATH）")
+    parser.add_argument("--verbose", action="store_true", help="requestをログ出力")
+    args = parser.parse_args(argv)
+
+    manager = TaskManager(args.store)
+    # 他のプロセスによるファイルの変更もchange feedに流す
+    manager.start_watching(lambda changed_ids, structural: None)
+    server = make_server(manager, args.host, args.port, args.verbose)
+    print(f"🚀 http://{args.host}:{args.port} で待機中 / listening (store: {manager.path})", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        manager.stop_watching()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
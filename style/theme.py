@@ -1,6 +1,20 @@
 """ Theme and styling configuration for the Todo application"""
+import tkinter as tk
 import tkinter.font as tkfont
 
+
+def _root_cache(name: str):
+    """default rootごとのcache dict（rootが作り直されたらcacheも作り直される）"""
+    root = tk._default_root
+    if root is None:
+        return None
+    cache = getattr(root, name, None)
+    if cache is None:
+        cache = {}
+        setattr(root, name, cache)
+    return cache
+
+
 class Theme:
     
     
@@ -24,10 +38,95 @@ class Theme:
 
         @classmethod
         def get(cls, size: int = None, overstrike: bool = False) -> tkfont.Font:
-            """設定されたdefault styleを取得 """
+            """設定されたdefault styleを取得（同じ設定のfontは1つだけ作って使い回す）"""
             if size is None:
                 size = cls.SIZE_NORMAL
-            return tkfont.Font(family=cls.FAMILY, size=size, overstrike=overstrike)
+            key = (cls.FAMILY, size, overstrike)
+            cache = _root_cache("_theme_fonts")
+            if cache is None:
+                return tkfont.Font(family=cls.FAMILY, size=size, overstrike=overstrike)
+            font = cache.get(key)
+            if font is None:
+                font = cache[key] = tkfont.Font(family=cls.FAMILY, size=size, overstrike=overstrike)
+            return font
+
+    class Style:
+        """widget styleのregistry：名前 → configure用のoptions（rootごとに1回だけ作る）"""
+
+        @classmethod
+        def get(cls, name: str) -> dict:
+            """名前付きstyleを取得。返り値は共有されるので変更しないこと """
+            cache = _root_cache("_theme_styles")
+            if cache is None:
+                return getattr(cls, f"_{name}")()
+            style = cache.get(name)
+            if style is None:
+                style = cache[name] = getattr(cls, f"_{name}")()
+            return style
+
+        @staticmethod
+        def _button() -> dict:
+            return dict(
+                bg=Theme.Color.BUTTON_BG,
+                fg=Theme.Color.TEXT,
+                font=Theme.Font.get(),
+                activebackground=Theme.Color.BUTTON_HOVER,
+                activeforeground=Theme.Color.TEXT,
+                relief="flat",
+                borderwidth=0,
+                padx=Theme.Layout.PADDING_X,
+                pady=Theme.Layout.PADDING_Y
+            )
+
+        @staticmethod
+        def _entry() -> dict:
+            return dict(
+                bg=Theme.Color.ENTRY_BG,
+                fg=Theme.Color.TEXT,
+                relief="flat",
+                font=Theme.Font.get(),
+                insertbackground=Theme.Color.TEXT,
+                highlightthickness=1,
+                highlightbackground=Theme.Color.BORDER,
+                highlightcolor=Theme.Color.BORDER_FOCUS,
+                bd=Theme.Layout.BORDER_WIDTH
+            )
+
+        @staticmethod
+        def _radiobutton() -> dict:
+            return dict(
+                bg=Theme.Color.BACKGROUND,
+                fg=Theme.Color.TEXT,
+                activebackground=Theme.Color.BACKGROUND,
+                activeforeground=Theme.Color.TEXT,
+                selectcolor=Theme.Color.BACKGROUND,
+                font=Theme.Font.get(),
+                relief="flat",
+                borderwidth=0,
+                highlightthickness=0,
+                padx=6,
+                pady=4,
+                anchor="w"
+            )
+
+        @staticmethod
+        def _row_label() -> dict:
+            return dict(
+                bg=Theme.Color.BACKGROUND,
+                fg=Theme.Color.TEXT,
+                font=Theme.Font.get(),
+                anchor="w",
+                justify="left"
+            )
+
+        @staticmethod
+        def _row_toggle() -> dict:
+            return dict(
+                bg=Theme.Color.BACKGROUND,
+                fg=Theme.Color.TEXT,
+                font=Theme.Font.get(),
+                width=2
+            )
 
     class Layout:
         """Layoutとspacing設定 """
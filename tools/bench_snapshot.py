@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""tasks.json と binary snapshot の保存/読み込み性能を比較するbenchmark
+
+save（cold）はツリー全体がdirtyな状態からの保存、save（1件）は1タスクを変更した後の保存
+（tasks.jsonは変更されていない部分のJSON fragmentを再利用する）。
+
+    python tools/bench_snapshot.py [--projects 20000] [--subtasks 5] [--repeat 3]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logic.task_manager import Task, TaskManager, _walk
+
+
+def build_tree(projects: int, subtasks: int):
+    """benchmark用のタスクツリーを生成（名前は適度に重複させる）"""
+    tasks = []
+    for i in range(projects):
+        parent = Task(id=f"{i:08d}-0000-4000-8000-000000000000", name=f"プロジェクト {i}")
+        for j in range(subtasks):
+            parent.subtasks.append(Task(id=f"{i:08d}-{j:04d}-4000-8000-000000000001",
+                                        name=f"サブタスク {j}", completed=(j % 3 == 0)))
+        tasks.append(parent)
+    return tasks
+
+
+def best_of(repeat: int, fn, setup=None) -> float:
+    """repeat回実行して最短時間（秒）を返す（setupは計測に含めない）"""
+    best = float("inf")
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--projects", type=int, default=20000)
+    parser.add_argument("--subtasks", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    tree = build_tree(args.projects, args.subtasks)
+    total = args.projects * (args.subtasks + 1)
+    print(f"tasks: {total:,}")
+    print(f"{'format':<10}{'size':>12}{'save cold':>12}{'save 1件':>12}{'load':>10}")
+
+    def dirty_all(tasks):
+        for t in _walk(tasks):
+            t.dirty, t._json = True, None
+
+    def touch_one(manager):
+        leaf = manager.tasks[len(manager.tasks) // 2].subtasks[0] if args.subtasks else manager.tasks[0]
+        leaf.completed = not leaf.completed
+        leaf.mark_dirty()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {}
+        for fmt in ("json", "snapshot"):
+            manager = TaskManager(os.path.join(tmp, "tasks.json"), fmt=fmt)
+            manager.tasks = tree
+            cold = best_of(args.repeat, manager.save, setup=lambda: dirty_all(manager.tasks))
+            incremental = best_of(args.repeat, manager.save, setup=lambda: touch_one(manager))
+            load = best_of(args.repeat, manager.load)
+            if len(manager.tasks) != args.projects:
+                print(f"❌ {fmt}: 読み込み結果が一致しません / round-trip mismatch")
+                return 1
+            size = os.path.getsize(manager.path)
+            results[fmt] = (size, cold, incremental, load)
+            print(f"{fmt:<10}{size:>12,}{cold * 1000:>10.1f}ms{incremental * 1000:>10.1f}ms{load * 1000:>8.1f}ms")
+
+    (js, jcold, jinc, jload), (ss, scold, sinc, sload) = results["json"], results["snapshot"]
+    print(f"snapshot / json: size {ss / js:.2f}x, save cold {scold / jcold:.2f}x, "
+          f"save 1件 {sinc / jinc:.2f}x, load {sload / jload:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""分解結果のparser（structured / streamed / text fallback）の速度を比較するbenchmark
+
+    python tools/bench_subtask_parser.py [--subtasks 8] [--repeat 20000] [--chunk 8]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logic.subtask_parser import SubtaskStreamParser, parse_structured, parse_text
+
+
+def sample_outputs(n: int):
+    """モデルの典型的な回答（JSON / 番号付きリスト）"""
+    items = [{"title": f"サブタスク {i}：資料を確認して要点をまとめる", "estimate_minutes": 15 * i, "order": i + 1}
+             for i in range(n)]
+    structured = json.dumps({"subtasks": items}, ensure_ascii=False, indent=2)
+    text = "以下がサブタスクです：\n" + "\n".join(f"{i + 1}. {item['title']}" for i, item in enumerate(items))
+    return structured, text
+
+
+def per_call_us(repeat: int, fn) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--subtasks", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=20000)
+    parser.add_argument("--chunk", type=int, default=8, help="streamed時のchunkの文字数")
+    args = parser.parse_args()
+
+    structured, text = sample_outputs(args.subtasks)
+    chunks = [structured[i:i + args.chunk] for i in range(0, len(structured), args.chunk)]
+
+    def streamed():
+        p = SubtaskStreamParser()
+        for chunk in chunks:
+            p.feed(chunk)
+        return p.close()
+
+    assert [s.title for s in parse_structured(structured)] == [s.title for s in streamed()] == parse_text(text)
+
+    print(f"subtasks={args.subtasks} repeat={args.repeat:,} ({len(structured)} / {len(text)} chars)")
+    print(f"json.loads（参考）      {per_call_us(args.repeat, lambda: json.loads(structured)):8.1f} µs")
+    print(f"structured（一括）      {per_call_us(args.repeat, lambda: parse_structured(structured)):8.1f} µs")
+    print(f"structured（{len(chunks)} chunks） {per_call_us(args.repeat, streamed):8.1f} µs")
+    print(f"text fallback          {per_call_us(args.repeat, lambda: parse_text(text)):8.1f} µs")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""_refresh_uiを繰り返してもTkのfont数とwidget数が増えないことを確認するleak check
+
+    python tools/check_font_leak.py [--refreshes 10000] [--projects 20]
+
+ディスプレイ（X / macOS / Windows）が必要。Linuxのheadless環境では xvfb-run 経由で実行する：
+
+    xvfb-run -a python tools/check_font_leak.py
+
+終了コード：0 = leakなし、1 = leakを検出、2 = ディスプレイがなく未検証（CIでpass扱いにしないため）。
+"""
+import os
+import sys
+import argparse
+import tempfile
+import tkinter as tk
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logic.task_manager import TaskManager
+from ui.app import TodoApp
+from ui.debug import count_widgets
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--refreshes", type=int, default=10000)
+    parser.add_argument("--projects", type=int, default=20)
+    args = parser.parse_args()
+
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"❓ UNVERIFIED：Tkを起動できません（ディスプレイが必要）/ cannot start Tk, leak check not run: {e}")
+        return 2
+    root.withdraw()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = TaskManager(os.path.join(tmp, "tasks.json"), fmt="json")
+        with manager.batch():
+            for i in range(args.projects):
+                parent = manager.add_task(f"プロジェクト {i}")
+                for j in range(5):
+                    manager.add_task(f"サブタスク {j}", parent=parent, completed=(j % 2 == 0))
+
+        app = TodoApp(root, task_manager=manager)
+        projects = manager.get_all_tasks()
+
+        def snapshot():
+            root.update_idletasks()
+            return len(root.tk.call("font", "names")), count_widgets(root), app.row_pool.widget_count
+
+        # 1周目でpoolとfontが揃ってから計測する
+        for task in projects:
+            app.expanded_ids = {task.id}
+            app._refresh_ui()
+        fonts_before, widgets_before, pool_before = snapshot()
+
+        for i in range(args.refreshes):
+            # 展開するプロジェクトを切り替えて、行の再利用/非表示の両方を通す
+            app.expanded_ids = {projects[i % len(projects)].id}
+            app.selected_task_id = projects[(i * 7) % len(projects)].id
+            app._refresh_ui()
+        fonts_after, widgets_after, pool_after = snapshot()
+
+        app.task_manager.stop_watching()
+        app.dispatcher.stop()
+    root.destroy()
+
+    print(f"refreshes: {args.refreshes:,}")
+    print(f"Tk fonts : {fonts_before} → {fonts_after}")
+    print(f"widgets  : {widgets_before} → {widgets_after}（row pool {pool_before} → {pool_after}）")
+    if fonts_after > fonts_before or widgets_after > widgets_before or pool_after > pool_before:
+        print("❌ leakを検出 / leak detected")
+        return 1
+    print("✅ leakなし / no leak")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""TaskManagerの並行stress test：add/toggle/delete/decomposeを多thread で実行し、不変条件とscalingを確認
+
+    python tools/stress_task_manager.py [--threads 1,2,4,8,16] [--ops 300] [--format json] [--latency-ms 20]
+
+分解はローカルのmock API（OpenAI互換のchat completions）に対して行う。
+thread数ごとにthroughputと self._lock の競合（待ち時間 / 保持時間）を表示する。
+不変条件の違反が見つかった場合は終了コード1。
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import count
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logic.backends import DecompositionBackend, HttpBackend
+from logic.task_manager import REMOTE_DISCARDED, TaskManager, _flatten, _walk
+
+REMOTE_STEPS = 3
+
+
+# ---------- 計測用のlock ----------
+class InstrumentedLock:
+    """threading.Lockの代わりに差し込む計測用lock（取得回数 / 競合回数 / 待ち時間 / 保持時間）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._owner = None
+        self._acquired_at = 0.0
+        self.acquisitions = 0
+        self.contended = 0
+        self.wait_time = 0.0
+        self.hold_time = 0.0
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        if self._lock.acquire(False):
+            waited = 0.0
+        elif not blocking:
+            return False
+        else:
+            started = time.perf_counter()
+            if not self._lock.acquire(True, timeout):
+                return False
+            waited = time.perf_counter() - started
+            self.contended += 1
+        # ここからはlockを保持しているので、カウンタの更新は排他的
+        self.acquisitions += 1
+        self.wait_time += waited
+        self._owner = threading.get_ident()
+        self._acquired_at = time.perf_counter()
+        return True
+
+    def release(self) -> None:
+        self.hold_time += time.perf_counter() - self._acquired_at
+        self._owner = None
+        self._lock.release()
+
+    def _is_owned(self) -> bool:
+        # threading.Conditionが使う（無い場合はacquire(False)で判定され、計測が狂う）
+        return self._owner == threading.get_ident()
+
+    __enter__ = acquire
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def instrument(manager: TaskManager) -> InstrumentedLock:
+    """managerのself._lock（とそれを使うCondition）を計測用lockに差し替える """
+    lock = InstrumentedLock()
+    manager._lock = lock
+    manager._version_changed = threading.Condition(lock)
+    return lock
+
+
+# ---------- mock API ----------
+class MockApiHandler(BaseHTTPRequestHandler):
+    """chat completionsのmock：latency後に番号付きリストを返す（内容はrequestごとに一意）"""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        time.sleep(self.server.latency)
+        request_no = next(self.server.counter)
+        content = "\n".join(f"{i + 1}. remote:{request_no}:{i}" for i in range(REMOTE_STEPS))
+        body = json.dumps({"choices": [{"message": {"content": content}}]}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_mock_api(latency: float) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockApiHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.counter = count()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class TaggedLocalBackend(DecompositionBackend):
+    """本物のlocal backendを実行し（ツリー走査の負荷はそのまま）、結果の名前にrequest番号を付ける
+
+    どの分解結果が反映されたかを後から判別するため。
+    """
+
+    name = "local"
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.counter = count()
+        self.counts = {}  # tag → 返した件数
+
+    def decompose(self, task_name):
+        names = self.inner.decompose(task_name)
+        tag = f"local:{next(self.counter)}"
+        self.counts[tag] = len(names)
+        return [f"{tag}:{i}" for i in range(len(names))]
+
+
+# ---------- workload ----------
+class Run:
+    """1回の計測で共有する記録（list.appendとdictへの代入はGILでatomic）"""
+
+    def __init__(self):
+        self.added = {}  # id → (root project id, 初期completed)
+        self.projects = []  # 追加されたプロジェクトのid
+        self.deleted = set()
+        self.decomposed = set()
+        self.toggles = Counter()  # 成功したtoggleの回数（threadごとに数えて最後に合算）
+        self.errors = []
+        self.lock = threading.Lock()
+
+
+def worker(manager: TaskManager, run: Run, n_ops: int, seed: int) -> None:
+    rng = random.Random(seed)
+    own_projects = []
+    toggles = Counter()
+    for i in range(n_ops):
+        op = rng.random()
+        if op < 0.25 or not own_projects:
+            task = manager.add_task(f"project {seed}-{i}", completed=rng.random() < 0.2)
+            run.added[task.id] = (task.id, task.completed)
+            run.projects.append(task.id)
+            own_projects.append(task)
+        elif op < 0.45:
+            # 他のthreadが削除中かもしれないプロジェクトにも追加する（その場合は消えるのが正しい）
+            parent = manager.find_task(rng.choice(run.projects)) or rng.choice(own_projects)
+            task = manager.add_task(f"sub {seed}-{i}", parent=parent)
+            run.added[task.id] = (_root_id(parent), task.completed)
+        elif op < 0.80:
+            task_id = rng.choice(list(run.added)) if run.added else None
+            if task_id and manager.toggle_task_completion(task_id):
+                toggles[task_id] += 1
+        elif op < 0.90:
+            task_id = rng.choice(run.projects)
+            if manager.delete_task(task_id):
+                run.deleted.add(task_id)
+        else:
+            # 同じプロジェクトを2回分解すると結果が2組になるのが正しいので、自分のプロジェクトを1回だけ
+            candidates = [t for t in own_projects if t.id not in run.decomposed]
+            if candidates:
+                task = rng.choice(candidates)
+                run.decomposed.add(task.id)
+
+                def on_complete(success, error, task_id=task.id):
+                    if not success and error not in ("選択されたタスクが存在しません。", REMOTE_DISCARDED):
+                        run.errors.append(f"分解失敗 {task_id}: {error}")
+
+                manager.decompose_task(task.id, on_complete)
+    with run.lock:
+        run.toggles.update(toggles)
+
+
+def _root_id(task) -> str:
+    while task.parent is not None:
+        task = task.parent
+    return task.id
+
+
+def wait_for_background(baseline: set, timeout: float) -> bool:
+    """分解worker（daemon thread）がすべて終わるまで待つ """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        # mock APIのrequest thread以外で、計測開始後に作られたthread
+        if not [t for t in threading.enumerate()
+                if t.ident not in baseline and "process_request" not in t.name]:
+            return True
+        time.sleep(0.02)
+    return False
+
+
+# ---------- 不変条件 ----------
+def check_invariants(manager: TaskManager, run: Run, local_counts: dict) -> list:
+    problems = list(run.errors)
+    nodes = list(_walk(manager.tasks))
+
+    # 重複なし / 親リンクが実際の親と一致（orphanなし）
+    ids = Counter(t.id for t in nodes)
+    problems += [f"重複したID {task_id} ×{n}" for task_id, n in ids.items() if n > 1]
+    for t in manager.tasks:
+        if t.parent is not None:
+            problems.append(f"トップレベルのタスクに親がある {t.id}")
+    for t in nodes:
+        for c in t.subtasks:
+            if c.parent is not t:
+                problems.append(f"親リンクが不一致 {c.id}（親 {t.id}）")
+
+    # lost updateなし：削除されていないプロジェクト配下の追加は残り、toggleの回数と状態が一致
+    present = {t.id: t for t in nodes}
+    for task_id, (root_id, initial) in run.added.items():
+        expected = root_id not in run.deleted
+        if expected != (task_id in present):
+            problems.append(f"{'消えた' if expected else '削除されたはずの'}タスク {task_id}")
+        elif expected and present[task_id].completed != (initial ^ (run.toggles[task_id] % 2 == 1)):
+            problems.append(f"toggleが失われた {task_id}（{run.toggles[task_id]}回）")
+
+    # 分解結果は1組だけ（local / remoteが二重に反映されていない）
+    for task_id in run.decomposed - run.deleted:
+        task = present.get(task_id)
+        if task is None:
+            continue
+        tags = Counter(c.name.rsplit(":", 1)[0] for c in task.subtasks if c.id not in run.added)
+        if len(tags) > 1:
+            problems.append(f"分解結果が二重 {task_id}: {dict(tags)}")
+        for tag, n in tags.items():
+            if n != (REMOTE_STEPS if tag.startswith("remote:") else local_counts.get(tag)):
+                problems.append(f"分解結果の件数が不一致 {task_id}: {tag} {n}件")
+
+    # ファイルが読み込めて、メモリ上の内容と一致
+    try:
+        reloaded = TaskManager(manager.json_path, fmt=manager.format)
+        if _flatten(reloaded.tasks) != _flatten(manager.tasks):
+            problems.append("保存されたファイルがメモリ上の内容と一致しない")
+    except Exception as e:  # noqa: BLE001（壊れたファイルの原因を問わず報告する）
+        problems.append(f"保存されたファイルを読み込めない：{e!r}")
+    return problems
+
+
+def run_once(threads: int, ops: int, fmt: str, policy: str, api_url: str, seed: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = TaskManager(os.path.join(tmp, "tasks.json"), fmt=fmt)
+        manager.remote_backend = HttpBackend("mock-key", api_url, "mock", retries=1, timeout=10)
+        manager.local_backend = TaggedLocalBackend(manager.local_backend)
+        manager.decompose_policy = policy
+        lock = instrument(manager)
+        run = Run()
+        baseline = {t.ident for t in threading.enumerate()}
+
+        workers = [threading.Thread(target=worker, args=(manager, run, ops, seed * 1000 + i))
+                   for i in range(threads)]
+        started = time.perf_counter()
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+        elapsed = time.perf_counter() - started
+        settled = wait_for_background(baseline, timeout=60)
+
+        problems = [] if settled else ["分解workerが終了しない"]
+        problems += check_invariants(manager, run, manager.local_backend.counts)
+
+        total_ops = threads * ops
+        stats = {
+            "threads": threads,
+            "ops": total_ops,
+            "ops_per_s": total_ops / elapsed,
+            "acquisitions": lock.acquisitions,
+            "contended": lock.contended / lock.acquisitions if lock.acquisitions else 0.0,
+            "wait_ms": lock.wait_time / lock.acquisitions * 1000 if lock.acquisitions else 0.0,
+            "hold_ms": lock.hold_time / lock.acquisitions * 1000 if lock.acquisitions else 0.0,
+            "busy": lock.hold_time / elapsed,
+            "tasks": sum(1 for _ in _walk(manager.tasks)),
+        }
+        return stats, problems
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", default="1,2,4,8,16", help="カンマ区切りのthread数")
+    parser.add_argument("--ops", type=int, default=300, help="threadごとの操作数")
+    parser.add_argument("--format", default="json", choices=["json", "snapshot", "sharded"])
+    parser.add_argument("--policy", default="local_then_remote", choices=["remote", "local", "local_then_remote"])
+    parser.add_argument("--latency-ms", type=float, default=20, help="mock APIの応答時間")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    api = start_mock_api(args.latency_ms / 1000)
+    api_url = f"http://127.0.0.1:{api.server_address[1]}/v1/chat/completions"
+
+    print(f"format={args.format} policy={args.policy} ops/thread={args.ops} mock latency={args.latency_ms:g}ms")
+    print(f"{'threads':>7} {'ops/s':>9} {'lock acq':>9} {'contended':>9} {'wait/acq':>10} {'hold/acq':>10} "
+          f"{'lock busy':>9} {'tasks':>7}  invariants")
+    failed = False
+    for threads in (int(n) for n in args.threads.split(",")):
+        stats, problems = run_once(threads, args.ops, args.format, args.policy, api_url, args.seed)
+        print(f"{stats['threads']:>7} {stats['ops_per_s']:>9,.0f} {stats['acquisitions']:>9,} "
+              f"{stats['contended']:>8.1%} {stats['wait_ms']:>8.3f}ms {stats['hold_ms']:>8.3f}ms "
+              f"{stats['busy']:>8.0%} {stats['tasks']:>7,}  {'✅' if not problems else f'❌ {len(problems)}'}")
+        for p in problems[:20]:
+            print(f"        - {p}")
+        failed |= bool(problems)
+    api.shutdown()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,11 +6,20 @@ from tkinter import ttk
 
 import sys
 import os
+import time
+import requests
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from logic.task_manager import TaskManager, Task
-from ui.components import AppleButton, AppleEntry, AppleRadiobutton, show_confirm, show_error
+from logic.client import RemoteTaskManager
+from ui.dispatch import UiDispatcher
+from ui.debug import PerfOverlay
+from ui.canvas_list import CanvasTaskList
+from ui.components import (AppleButton, AppleEntry, AppleRadiobutton, ArchiveDialog, TaskRowPool, show_confirm,
+                           show_error, show_info)
 from style.theme import Theme
+from config import (AUTO_ARCHIVE, PROFILE_CAPTURE_INTERACTIONS, PROFILES_DIR, TASK_LIST_RENDERER,
+                    TODO_SERVICE_URL)
 
 # ==================== Application Class ====================
 
@@ -18,18 +27,26 @@ from style.theme import Theme
 class TodoApp:
     """ Main application class for the Todo application"""
     
-    def __init__(self, root):
+    def __init__(self, root, task_manager: TaskManager | RemoteTaskManager | None = None):
         self.root = root
-        self.task_manager = TaskManager()
+        self.task_manager = task_manager or TaskManager()
         self.selected_task_id: str | None = None  # 選択状態 
         self.expanded_ids: set[str] = set()  # "展開済み"のタスクIDを記録 
+        self.last_refresh_ms: float | None = None  # 直近の_refresh_uiの所要時間（perf overlay用）
 
         # フォントを初期化（通常 / 取り消し線）
         self.font_normal = Theme.Font.get()
         self.font_overstrike = Theme.Font.get(overstrike=True)
 
+        # 完了済みプロジェクトはworking setから外す 
+        if AUTO_ARCHIVE:
+            self.task_manager.auto_archive()
+
         self._setup_window()
+        self._build_menu()
         self._build_ui()
+        # F12：perf overlay / Shift+F12：次の操作をprofile
+        self.perf_overlay = PerfOverlay(self, PROFILES_DIR, PROFILE_CAPTURE_INTERACTIONS)
         
         # Top levelをdefaultで展開
         for t in self.task_manager.get_all_tasks():
@@ -37,12 +54,35 @@ class TodoApp:
         
         self._refresh_ui()
 
+        # background threadからの結果はdispatcher経由でframeごとにまとめて反映 
+        self.dispatcher = UiDispatcher(self.root, self._apply_changes)
+
+        # 他のインスタンス/同期ツールによる tasks.json の変更を監視 
+        self.task_manager.start_watching(self._on_store_changed)
+
     def _setup_window(self):
         """main windowを設定 """
         self.root.title("タスク管理")
         self.root.geometry("420x640")
         self.root.configure(bg=Theme.Color.BACKGROUND)
 
+    def _build_menu(self):
+        """menu barを作成 """
+        menubar = tk.Menu(self.root)
+        archive_menu = tk.Menu(menubar, tearoff=0)
+        archive_menu.add_command(label="選択中のタスクをアーカイブ", command=self._archive_selected)
+        archive_menu.add_command(label="完了済みをすべてアーカイブ", command=self._archive_completed)
+        archive_menu.add_separator()
+        archive_menu.add_command(label="アーカイブを表示…", command=self._open_archive)
+        menubar.add_cascade(label="アーカイブ", menu=archive_menu)
+        debug_menu = tk.Menu(menubar, tearoff=0)
+        debug_menu.add_command(label="パフォーマンス表示", accelerator="F12",
+                               command=lambda: self.perf_overlay.toggle())
+        debug_menu.add_command(label="プロファイルを記録", accelerator="Shift+F12",
+                               command=lambda: self.perf_overlay.toggle_capture())
+        menubar.add_cascade(label="デバッグ", menu=debug_menu)
+        self.root.configure(menu=menubar)
+
     def _build_ui(self):
         """ Build the user interface"""
         self.main_frame = tk.Frame(self.root, bg=Theme.Color.BACKGROUND)
@@ -69,11 +109,30 @@ class TodoApp:
             "<Configure>",
             lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all"))
         )
-        self.canvas.create_window((0, 0), window=self.tasks_container, anchor="nw")
         self.canvas.configure(yscrollcommand=self.scrollbar.set)
         self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
 
+        # canvas renderer：行をcanvas itemとして直接描画（widgetを作らない）
+        self.canvas_list = None
+        if TASK_LIST_RENDERER == "canvas":
+            self.canvas_list = CanvasTaskList(
+                self.canvas,
+                self.font_normal,
+                self.font_overstrike,
+                on_select=self._select_parent_task,
+                on_toggle_expand=self._toggle_expand,
+                on_toggle_mark=self._toggle_mark_subtask
+            )
+        else:
+            self.canvas.create_window((0, 0), window=self.tasks_container, anchor="nw")
+        self.row_pool = TaskRowPool(
+            self.tasks_container,
+            on_select=self._select_parent_task,
+            on_toggle_expand=self._toggle_expand,
+            on_toggle_mark=self._toggle_mark_subtask
+        )
+
         # -------------------- Buttons --------------------
       
         self.bottom_frame = tk.Frame(self.main_frame, bg=Theme.Color.BACKGROUND)
@@ -119,16 +178,28 @@ class TodoApp:
 
     # ==================== UI Refresh & Rendering ====================
     def _refresh_ui(self):
+        """タスク一覧を再描画（所要時間をperf overlay用に記録）"""
+        started = time.perf_counter()
+        self._render_task_list()
+        self.last_refresh_ms = (time.perf_counter() - started) * 1000
+
+    def _render_task_list(self):
         
-        # Clear container
-        for w in self.tasks_container.winfo_children():
-            w.destroy()
+        if self.canvas_list:
+            self.canvas_list.render(self.task_manager.get_all_tasks(), self.expanded_ids, self.selected_task_id)
+            self._update_bottom_buttons()
+            self._refresh_progress()
+            return
 
+        # 行widgetはpoolから再利用（destroy/createしない）
+        self.row_pool.begin()
         self._radio_vars = []  # Changed to store Radio button variables
         self._task_widgets = []
+        self._row_widgets: dict[str, tk.Widget] = {}  # task id → 行のtext widget（部分更新用）
 
         for task in self.task_manager.get_all_tasks():
             self._add_task_widget(task, level=0)
+        self.row_pool.end()
         
         # bottom_buttons状態を更新 
         self._update_bottom_buttons()
@@ -138,86 +209,66 @@ class TodoApp:
     # -------------------- Task行の描画 --------------------
     def _add_task_widget(self, task: Task, level: int):
         """UIにtask widgetを追加 """
-        # Row container
-        row = tk.Frame(self.tasks_container, bg=Theme.Color.BACKGROUND)
-        row.pack(anchor="w", fill=tk.X, pady=2)
-
+        row = self.row_pool.acquire()
         has_children = bool(task.subtasks)
-
-        # 右側"展開/収納"三角
-        if has_children:
-            is_open = (task.id in self.expanded_ids)
-            glyph = "▾" if is_open else "▸"
-            toggle = tk.Label(
-                row,
-                text=glyph,
-                bg=Theme.Color.BACKGROUND,
-                fg=Theme.Color.TEXT,
-                font=Theme.Font.get(),
-                width=2
-            )
-            toggle.grid(row=0, column=2, padx=(4, 8), sticky="e")
-            toggle.bind("<Button-1>", lambda e, t=task: self._toggle_expand(t))
-            toggle.bind("<Enter>",  lambda e: toggle.config(cursor="hand2"))
-            toggle.bind("<Leave>",  lambda e: toggle.config(cursor=""))
-
+        widget = row.show(
+            task,
+            level,
+            selected=(self.selected_task_id == task.id),
+            expanded=(task.id in self.expanded_ids),
+            font_normal=self.font_normal,
+            font_overstrike=self.font_overstrike
+        )
         if level == 0:
-            # Radio buttonを使用 
-            var = tk.BooleanVar(value=(self.selected_task_id == task.id))
-            rb = AppleRadiobutton(
-                row,
-                text=task.name,
-                variable=var,
-                value=True,
-                command=lambda t=task: self._select_parent_task(t)
-            )
-            # radio buttonのauto-wrap 
-            try:
-                wrap_px = max(160, 340 - level*20)
-                rb.configure(wraplength=wrap_px, justify='left')
-            except Exception:
-                pass
-            rb.grid(row=0, column=0, padx=10 + level*20, pady=2, sticky="ew")
-            
-            # 親項目：線引き不可
-            rb.configure(
-                bg=Theme.Color.BACKGROUND,
-                font=self.font_normal
-            )
-
-            self._radio_vars.append(var)
-            self._task_widgets.append(rb)
-        else:
-            # 子項目：テキストのみ表示、線引き可能 
-            is_marked = task.completed
-            label = tk.Label(
-                row,
-                text=task.name,
-                bg=Theme.Color.BACKGROUND,
-                fg=Theme.Color.TEXT,
-                font=self.font_overstrike if is_marked else self.font_normal,
-                anchor="w"
-            )
-            # 子項目のauto-wrap 
-            try:
-                wrap_px = max(160, 340 - level*20)
-                label.configure(wraplength=wrap_px, justify='left')
-            except Exception:
-                pass
-            label.grid(row=0, column=0, padx=10 + level*20, pady=2, sticky="ew")
-            
-            # 子項目はクリックで線引き可能 
-            label.bind("<Button-1>", lambda e, t=task: self._toggle_mark_subtask(t))
-            label.bind("<Enter>",  lambda e: label.config(cursor="hand2"))
-            label.bind("<Leave>",  lambda e: label.config(cursor=""))
-
-            self._task_widgets.append(label)
+            self._radio_vars.append(row.var)
+        self._task_widgets.append(widget)
+        self._row_widgets[task.id] = widget
 
         # 子項目を再帰的にレンダリング：「展開済み」の場合のみ 
         if has_children and (task.id in self.expanded_ids):
             for sub in task.subtasks:
                 self._add_task_widget(sub, level+1)
 
+    def _update_task_rows(self, task_ids):
+        """指定タスクの行のみを更新（行の追加/削除を伴わない変更用）"""
+        if self.canvas_list:
+            tasks = [t for t in map(self.task_manager.find_task, task_ids) if t]
+            if not self.canvas_list.update_rows(tasks):
+                self._refresh_ui()
+                return
+            self._refresh_progress()
+            return
+        for task_id in task_ids:
+            widget = self._row_widgets.get(task_id)
+            task = self.task_manager.find_task(task_id)
+            if widget is None or task is None:
+                continue
+            if isinstance(widget, AppleRadiobutton):
+                widget.configure(text=task.name)
+            else:
+                widget.configure(
+                    text=task.name,
+                    font=self.font_overstrike if task.completed else self.font_normal
+                )
+        self._refresh_progress()
+
+    # ==================== Model Changes ====================
+    def _on_store_changed(self, changed_ids: set[str], structural: bool):
+        """watcher threadから呼ばれる：dispatcherに積んで次のframeで反映 """
+        self.dispatcher.invalidate(changed_ids, structural)
+
+    def _apply_changes(self, changed_ids: set[str], structural: bool):
+        """1 frame分のモデル変更をUIに反映。構造変更がなければ該当行のみ更新 """
+        if self.selected_task_id and not self._get_selected_task():
+            # 選択中のタスクが外部で削除された 
+            self.selected_task_id = None
+            structural = True
+        if structural or len(changed_ids) > 100:
+            # 行の追加/削除がある、または変更が多い場合は全体を1回だけ再構築 
+            self._refresh_ui()
+        else:
+            self._update_task_rows(changed_ids)
+
     # ==================== Event Handlers ====================
     def _toggle_expand(self, task: Task):
         """展開/収納状態を切り替え - 同時に1つの親項目のみ展開可能 """
@@ -242,7 +293,8 @@ class TodoApp:
         """子項目の線引きを切り替え"""
         
         self.task_manager.toggle_task_completion(task.id)
-        self._refresh_ui()
+        # main threadなのでdispatcherを経由せずにその場で反映（invalidateはbackground thread用）
+        self._apply_changes({task.id}, False)
 
     # ==================== Utilities ====================
     def _iter_descendants(self, task: Task):
@@ -348,23 +400,34 @@ class TodoApp:
         """選択されたタスクを分解 """
         if not self.selected_task_id:
             return
+        task_id = self.selected_task_id
         self._set_busy(True, "分解中…")
+        reported = False
 
         def on_complete(success: bool, error: str | None):
+            # local_then_remoteでは2回呼ばれる：1回目が分解の完了、2回目はremote結果への置き換え
+            nonlocal reported
+            first, reported = not reported, True
             #  Return to main thread and refresh
-            self.root.after(0, lambda: self._on_decompose_done(success, error))
+            self.dispatcher.post(self._on_decompose_done, task_id, success, error, first)
 
-        self.task_manager.decompose_task(self.selected_task_id, on_complete)
+        self.task_manager.decompose_task(task_id, on_complete)
 
-    def _on_decompose_done(self, success: bool, error: str | None):
+    def _on_decompose_done(self, task_id: str, success: bool, error: str | None, first: bool = True):
         """分解完了処理 """
+        if not first:
+            # remote結果への置き換え：busy状態/選択/展開はユーザーの現在の操作のまま
+            if success:
+                self._apply_changes(set(), True)
+            elif error:
+                show_info("分解", error)  # 編集済みのlocal結果を残した
+            return
         self._set_busy(False, "")
         if success:
             # 分解完了後に自動的にそのタスクを展開 
-            if self.selected_task_id:
-                self.expanded_ids.clear()  # まず他の展開をクリア 
-                self.expanded_ids.add(self.selected_task_id)  # 現在のタスクを展開 
-            self._refresh_ui()
+            self.expanded_ids.clear()  # まず他の展開をクリア 
+            self.expanded_ids.add(task_id)  # 分解したタスクを展開 
+            self._apply_changes(set(), True)
         else:
             message = error or "未知のエラー"  # Unknown error
             show_error("分解失敗", message)
@@ -386,17 +449,59 @@ class TodoApp:
         self.selected_task_id = None
         self._refresh_ui()
 
+    # ==================== Archive ====================
+    def _archive_selected(self):
+        """選択中のプロジェクトをarchive """
+        if not self.selected_task_id:
+            return
+        if self.task_manager.archive_tasks([self.selected_task_id]):
+            self.selected_task_id = None
+            self._refresh_ui()
+
+    def _archive_completed(self):
+        """完了済みのプロジェクトをすべてarchive """
+        if self.task_manager.auto_archive():
+            if self.selected_task_id and not self._get_selected_task():
+                self.selected_task_id = None
+            self._refresh_ui()
+
+    def _open_archive(self):
+        """archive browserを表示し、復元されたプロジェクトを反映 """
+        dialog = ArchiveDialog(
+            self.root,
+            self.task_manager.get_archived_tasks(),
+            self.task_manager.load_archived_task,
+            self.task_manager.restore_task
+        )
+        if dialog.restored_ids:
+            self.expanded_ids.update(dialog.restored_ids)
+            self._refresh_ui()
+
     # ==================== アプリケーション起動 ====================
     def run(self):
         """ Start the application main loop"""
-        self.root.mainloop()
+        try:
+            self.root.mainloop()
+        finally:
+            self.task_manager.stop_watching()
+            self.dispatcher.stop()
 
 
 # ==================== Entry Points ====================
 def run_app():
    
     root = tk.Tk()
-    app = TodoApp(root)
+    # TODO_SERVICE_URLが設定されていればservice.pyのclientとして動く
+    manager = None
+    if TODO_SERVICE_URL:
+        try:
+            manager = RemoteTaskManager(TODO_SERVICE_URL)
+        except requests.RequestException as e:
+            root.withdraw()
+            show_error("接続エラー", f"service（{TODO_SERVICE_URL}）に接続できません：\n{e}")
+            root.destroy()
+            return
+    app = TodoApp(root, task_manager=manager)
     app.run()
 
 
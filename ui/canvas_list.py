@@ -0,0 +1,182 @@
+"""Single-canvas task list renderer：行ごとのwidgetを作らず、canvas itemで描画する"""
+import bisect
+import tkinter as tk
+from style.theme import Theme
+
+
+class CanvasTaskList:
+    """既存のcanvasにタスク行を直接描画し、クリック位置から行を判定する
+
+    1行あたりのコスト：text 1個 + radio（親のみ、円1〜2個）+ 展開三角（子を持つ場合のみ）
+    """
+
+    INDENT = 20          # 1階層あたりのインデント
+    PAD_X = 10           # 左余白（widget版のpadxに合わせる）
+    RADIO_SIZE = 12      # radioの直径
+    ROW_PAD_Y = 4        # 行の上下余白
+    TOGGLE_WIDTH = 30    # 右端の展開三角の判定幅
+    WRAP_CACHE_LIMIT = 5000
+
+    def __init__(self, canvas: tk.Canvas, font_normal, font_overstrike,
+                 on_select, on_toggle_expand, on_toggle_mark):
+        self.canvas = canvas
+        self.font_normal = font_normal
+        self.font_overstrike = font_overstrike
+        self.on_select = on_select
+        self.on_toggle_expand = on_toggle_expand
+        self.on_toggle_mark = on_toggle_mark
+
+        self._rows = []          # (top, bottom, task, level) を上から順に
+        self._row_tops = []      # bisect用
+        self._text_items = {}    # task id → (text item, 行数, level)（部分更新用）
+        self._wrap_cache = {}    # (text, font, width) → 折り返し済みtext
+        self._char_widths = {}   # font → {文字: 幅}
+        self._line_height = self.font_normal.metrics("linespace")
+        self._last_args = None
+
+        self.canvas.bind("<Button-1>", self._on_click)
+        self.canvas.bind("<Motion>", self._on_motion)
+        self.canvas.bind("<Configure>", self._on_resize, add="+")
+
+    # ==================== Rendering ====================
+    def render(self, tasks, expanded_ids, selected_id):
+        """タスク一覧を描画し直す """
+        self._last_args = (tasks, expanded_ids, selected_id)
+        self.canvas.delete("row")
+        self._rows = []
+        self._row_tops = []
+        self._text_items = {}
+        width = max(self.canvas.winfo_width(), 200)
+
+        y = 0
+        stack = [(t, 0) for t in reversed(tasks)]
+        while stack:
+            task, level = stack.pop()
+            y = self._draw_row(task, level, y, width, expanded_ids, selected_id)
+            # 子項目は「展開済み」の場合のみ
+            if task.subtasks and task.id in expanded_ids:
+                stack.extend((c, level + 1) for c in reversed(task.subtasks))
+
+        self.canvas.configure(scrollregion=(0, 0, width, y))
+
+    def _draw_row(self, task, level, top, width, expanded_ids, selected_id) -> int:
+        """1行を描画し、次の行のy座標を返す """
+        x = self.PAD_X + level * self.INDENT
+        text_y = top + self.ROW_PAD_Y
+        if level == 0:
+            # 親項目：radio（円）+ 名前
+            r = self.RADIO_SIZE
+            cy = text_y + self._line_height // 2
+            self.canvas.create_oval(x, cy - r // 2, x + r, cy + r // 2,
+                                    outline=Theme.Color.TEXT, tags="row")
+            if task.id == selected_id:
+                self.canvas.create_oval(x + 3, cy - r // 2 + 3, x + r - 3, cy + r // 2 - 3,
+                                        fill=Theme.Color.TEXT, outline="", tags="row")
+            x += r + 8
+            font = self.font_normal
+        else:
+            # 子項目：テキストのみ、完了は取り消し線
+            x += 6
+            font = self.font_overstrike if task.completed else self.font_normal
+
+        wrap_px = max(160, 340 - level * 20)
+        text, lines = self._wrap(task.name, font, wrap_px)
+        item = self.canvas.create_text(x, text_y, text=text, font=font, fill=Theme.Color.TEXT,
+                                       anchor="nw", tags="row")
+        self._text_items[task.id] = (item, lines, level)
+
+        if task.subtasks:
+            glyph = "▾" if task.id in expanded_ids else "▸"
+            self.canvas.create_text(width - self.TOGGLE_WIDTH // 2, text_y, text=glyph, font=self.font_normal,
+                                    fill=Theme.Color.TEXT, anchor="n", tags="row")
+
+        bottom = text_y + lines * self._line_height + self.ROW_PAD_Y
+        self._rows.append((top, bottom, task, level))
+        self._row_tops.append(top)
+        return bottom
+
+    def update_rows(self, tasks) -> bool:
+        """指定タスクの行のみ更新。行の高さが変わる場合はFalse（全体の再描画が必要）"""
+        for task in tasks:
+            entry = self._text_items.get(task.id)
+            if entry is None:
+                continue
+            item, lines, level = entry
+            font = self.font_overstrike if (level and task.completed) else self.font_normal
+            text, new_lines = self._wrap(task.name, font, max(160, 340 - level * 20))
+            if new_lines != lines:
+                return False
+            self.canvas.itemconfigure(item, text=text, font=font)
+        return True
+
+    # ==================== Text wrap（測定結果をcache） ====================
+    def _wrap(self, text, font, width):
+        """textを幅widthで折り返し、(折り返し済みtext, 行数) を返す """
+        key = (text, str(font), width)
+        cached = self._wrap_cache.get(key)
+        if cached is not None:
+            return cached
+        if len(self._wrap_cache) > self.WRAP_CACHE_LIMIT:
+            self._wrap_cache.clear()
+
+        widths = self._char_widths.setdefault(str(font), {})
+        lines = []
+        for paragraph in text.split("\n"):
+            line, line_w = "", 0
+            for ch in paragraph:
+                w = widths.get(ch)
+                if w is None:
+                    w = widths[ch] = font.measure(ch)
+                if line and line_w + w > width:
+                    # 空白があればそこで、なければ文字単位で折り返す（日本語向け）
+                    cut = line.rfind(" ")
+                    if cut > 0:
+                        lines.append(line[:cut])
+                        line = line[cut + 1:]
+                    else:
+                        lines.append(line)
+                        line = ""
+                    line_w = sum(widths[c] for c in line)
+                line += ch
+                line_w += w
+            lines.append(line)
+
+        result = ("\n".join(lines), len(lines))
+        self._wrap_cache[key] = result
+        return result
+
+    # ==================== Hit-testing ====================
+    def _hit(self, event):
+        """イベント位置の (task, level, 展開三角の上か) を返す """
+        y = self.canvas.canvasy(event.y)
+        i = bisect.bisect_right(self._row_tops, y) - 1
+        if i < 0:
+            return None
+        top, bottom, task, level = self._rows[i]
+        if y >= bottom:
+            return None
+        on_toggle = bool(task.subtasks) and event.x >= self.canvas.winfo_width() - self.TOGGLE_WIDTH
+        return task, level, on_toggle
+
+    def _on_click(self, event):
+        hit = self._hit(event)
+        if not hit:
+            return
+        task, level, on_toggle = hit
+        if on_toggle:
+            self.on_toggle_expand(task)
+        elif level == 0:
+            self.on_select(task)
+        else:
+            self.on_toggle_mark(task)
+
+    def _on_motion(self, event):
+        """子項目と展開三角の上ではhand cursor """
+        hit = self._hit(event)
+        clickable = bool(hit) and (hit[2] or hit[1] > 0)
+        self.canvas.configure(cursor="hand2" if clickable else "")
+
+    def _on_resize(self, event):
+        """幅が変わったら展開三角の位置を合わせて再描画 """
+        if self._last_args is not None:
+            self.render(*self._last_args)
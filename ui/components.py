@@ -13,17 +13,7 @@ class AppleButton(tk.Button):
     
     def __init__(self, master=None, **kwargs):
         super().__init__(master, **kwargs)
-        self.configure(
-            bg=Theme.Color.BUTTON_BG,
-            fg=Theme.Color.TEXT,
-            font=Theme.Font.get(),
-            activebackground=Theme.Color.BUTTON_HOVER,
-            activeforeground=Theme.Color.TEXT,
-            relief="flat",
-            borderwidth=0,
-            padx=Theme.Layout.PADDING_X,
-            pady=Theme.Layout.PADDING_Y
-        )
+        self.configure(**Theme.Style.get("button"))
         self.bind("<Enter>", self._on_hover)
         self.bind("<Leave>", self._on_leave)
 
@@ -41,17 +31,7 @@ class AppleEntry(tk.Entry):
     
     def __init__(self, master=None, **kwargs):
         super().__init__(master, **kwargs)
-        self.configure(
-            bg=Theme.Color.ENTRY_BG,
-            fg=Theme.Color.TEXT,
-            relief="flat",
-            font=Theme.Font.get(),
-            insertbackground=Theme.Color.TEXT,
-            highlightthickness=1,
-            highlightbackground=Theme.Color.BORDER,
-            highlightcolor=Theme.Color.BORDER_FOCUS,
-            bd=Theme.Layout.BORDER_WIDTH
-        )
+        self.configure(**Theme.Style.get("entry"))
 
 
 class AppleRadiobutton(tk.Radiobutton):
@@ -59,20 +39,98 @@ class AppleRadiobutton(tk.Radiobutton):
     
     def __init__(self, master=None, **kwargs):
         super().__init__(master, **kwargs)
-        self.configure(
-            bg=Theme.Color.BACKGROUND,
-            fg=Theme.Color.TEXT,
-            activebackground=Theme.Color.BACKGROUND,
-            activeforeground=Theme.Color.TEXT,
-            selectcolor=Theme.Color.BACKGROUND,
-            font=Theme.Font.get(),
-            relief="flat",
-            borderwidth=0,
-            highlightthickness=0,
-            padx=6,
-            pady=4,
-            anchor="w"
-        )
+        self.configure(**Theme.Style.get("radiobutton"))
+
+
+# ============================================================================
+#  Task rows（refreshのたびに作り直さず再利用する）
+# ============================================================================
+
+class TaskRow:
+    """1行分のwidget一式：親項目はradio、子項目はlabel、子を持つ場合は展開三角
+
+    bindは作成時に1回だけ行い、表示中のタスクは self.task で参照する。
+    """
+
+    def __init__(self, master, on_select, on_toggle_expand, on_toggle_mark):
+        self.task = None
+        self.frame = tk.Frame(master, bg=Theme.Color.BACKGROUND)
+        self.var = tk.BooleanVar(value=False)
+        self.radio = AppleRadiobutton(self.frame, variable=self.var, value=True,
+                                      command=lambda: on_select(self.task))
+        self.label = tk.Label(self.frame, **Theme.Style.get("row_label"))
+        self.label.bind("<Button-1>", lambda e: on_toggle_mark(self.task))
+        self.label.bind("<Enter>", lambda e: self.label.config(cursor="hand2"))
+        self.label.bind("<Leave>", lambda e: self.label.config(cursor=""))
+        self.toggle = tk.Label(self.frame, **Theme.Style.get("row_toggle"))
+        self.toggle.bind("<Button-1>", lambda e: on_toggle_expand(self.task))
+        self.toggle.bind("<Enter>", lambda e: self.toggle.config(cursor="hand2"))
+        self.toggle.bind("<Leave>", lambda e: self.toggle.config(cursor=""))
+
+    def show(self, task, level: int, selected: bool, expanded: bool, font_normal, font_overstrike):
+        """行をtaskの内容で構成し、表示しているtext widgetを返す """
+        self.task = task
+        wrap_px = max(160, 340 - level*20)
+        if level == 0:
+            self.label.grid_remove()
+            self.var.set(selected)
+            self.radio.configure(text=task.name, wraplength=wrap_px, justify="left", font=font_normal)
+            self.radio.grid(row=0, column=0, padx=10 + level*20, pady=2, sticky="ew")
+            widget = self.radio
+        else:
+            self.radio.grid_remove()
+            self.label.configure(
+                text=task.name,
+                wraplength=wrap_px,
+                font=font_overstrike if task.completed else font_normal
+            )
+            self.label.grid(row=0, column=0, padx=10 + level*20, pady=2, sticky="ew")
+            widget = self.label
+
+        if task.subtasks:
+            self.toggle.configure(text="▾" if expanded else "▸")
+            self.toggle.grid(row=0, column=2, padx=(4, 8), sticky="e")
+        else:
+            self.toggle.grid_remove()
+        return widget
+
+
+class TaskRowPool:
+    """TaskRowのpool：refresh時は先頭から順に再利用し、余った行は隠すだけ """
+
+    def __init__(self, master, on_select, on_toggle_expand, on_toggle_mark):
+        self.master = master
+        self._callbacks = (on_select, on_toggle_expand, on_toggle_mark)
+        self._rows: list[TaskRow] = []
+        self._visible = 0  # 現在表示している行数
+        self._used = 0     # 今回のrefreshで使った行数
+
+    def begin(self):
+        """refreshの開始 """
+        self._used = 0
+
+    def acquire(self) -> TaskRow:
+        """次の行を取得（足りなければ作成）"""
+        if self._used == len(self._rows):
+            self._rows.append(TaskRow(self.master, *self._callbacks))
+        row = self._rows[self._used]
+        if self._used >= self._visible:
+            # 隠れている行は末尾から順に再表示されるので、packの順序は保たれる
+            row.frame.pack(anchor="w", fill=tk.X, pady=2)
+        self._used += 1
+        return row
+
+    def end(self):
+        """refreshの終了：今回使わなかった行を隠す """
+        for row in self._rows[self._used:self._visible]:
+            row.frame.pack_forget()
+            row.task = None
+        self._visible = self._used
+
+    @property
+    def widget_count(self) -> int:
+        """poolが保持しているwidgetの総数（1行 = frame + radio + label + toggle）"""
+        return len(self._rows) * 4
 
 
 # ============================================================================
@@ -147,6 +205,96 @@ class ConfirmDialog(tk.Toplevel):
         self.destroy()
 
 
+class ArchiveDialog(tk.Toplevel):
+    """archive済みプロジェクトのbrowser：一覧はindexのみ、中身は選択時に読み込む """
+
+    def __init__(self, parent, entries, load_task, restore_task):
+        super().__init__(parent)
+        self.restored_ids = []
+        self._entries = list(entries)
+        self._load_task = load_task
+        self._restore_task = restore_task
+
+        # Window設定 
+        self.title("アーカイブ")
+        self.configure(bg=Theme.Color.BACKGROUND)
+        self.transient(parent)
+        self.grab_set()
+
+        main_frame = tk.Frame(self, bg=Theme.Color.BACKGROUND, padx=20, pady=15)
+        main_frame.pack(expand=True, fill=tk.BOTH)
+
+        # Project list
+        self.listbox = tk.Listbox(
+            main_frame,
+            font=Theme.Font.get(),
+            bg=Theme.Color.ENTRY_BG,
+            fg=Theme.Color.TEXT,
+            selectbackground=Theme.Color.BUTTON_HOVER,
+            selectforeground=Theme.Color.TEXT,
+            relief="flat",
+            highlightthickness=1,
+            highlightbackground=Theme.Color.BORDER,
+            width=36,
+            height=10
+        )
+        self.listbox.pack(fill=tk.BOTH, expand=True)
+        self.listbox.bind("<<ListboxSelect>>", self._on_select)
+        for entry in self._entries:
+            self.listbox.insert(tk.END, f"{entry['name']}  ({entry['completed_subtasks']}/{entry['subtasks']})")
+
+        # 選択したプロジェクトのサブタスク（lazy load）
+        self.preview = tk.Label(
+            main_frame,
+            text="" if self._entries else "アーカイブはありません。",
+            font=Theme.Font.get(Theme.Font.SIZE_SMALL),
+            bg=Theme.Color.BACKGROUND,
+            fg=Theme.Color.FADED_TEXT,
+            wraplength=320,
+            justify="left",
+            anchor="w"
+        )
+        self.preview.pack(fill=tk.X, pady=(10, 10))
+
+        # Buttons
+        button_frame = tk.Frame(main_frame, bg=Theme.Color.BACKGROUND)
+        button_frame.pack()
+        self.restore_button = AppleButton(button_frame, text="復元", width=8, command=self._on_restore,
+                                          state="disabled")
+        self.restore_button.pack(side=tk.LEFT, padx=10)
+        self.close_button = AppleButton(button_frame, text="閉じる", width=8, command=self.destroy)
+        self.close_button.pack(side=tk.LEFT, padx=10)
+
+        self.wait_window(self)
+
+    def _selected_entry(self):
+        selection = self.listbox.curselection()
+        return self._entries[selection[0]] if selection else None
+
+    def _on_select(self, event):
+        """選択時にshardからプロジェクトを読み込んでpreview表示 """
+        entry = self._selected_entry()
+        if not entry:
+            return
+        task = self._load_task(entry["id"])
+        lines = [("✓ " if t.completed else "・") + t.name for t in task.subtasks] if task else []
+        self.preview.configure(text="\n".join(lines) or "（サブタスクなし）")
+        self.restore_button.configure(state="normal")
+
+    def _on_restore(self):
+        """選択中のプロジェクトを復元 """
+        entry = self._selected_entry()
+        if not entry:
+            return
+        if self._restore_task(entry["id"]):
+            self.restored_ids.append(entry["id"])
+        index = self._entries.index(entry)
+        del self._entries[index]
+        self.listbox.delete(index)
+        self.preview.configure(text="")
+        self.restore_button.configure(state="disabled")
+
+
 # ============================================================================
 # 便利関数 / Convenience Functions
 # ============================================================================
@@ -160,3 +308,8 @@ def show_confirm(parent, title="确认", message="确定要执行此操作吗？
 def show_error(title, message):
     """Show error """
     return messagebox.showerror(title, message)
+
+
+def show_info(title, message):
+    """Show info """
+    return messagebox.showinfo(title, message)
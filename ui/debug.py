@@ -0,0 +1,210 @@
+"""Debug用のperf overlayとprofile capture（ユーザーの環境で遅さを再現・記録するため）"""
+import os
+import sys
+import pstats
+import cProfile
+import tracemalloc
+import tkinter as tk
+from datetime import datetime
+
+from style.theme import Theme
+
+
+def process_rss_mb() -> float | None:
+    """現在のprocessのRSS（MB）。取得できない環境ではNone """
+    try:
+        with open("/proc/self/status", "r", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None  # Windows
+    # /procがない（macOSなど）：peak RSSで代用。macOSはbytes、それ以外はKB
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def count_widgets(widget) -> int:
+    """widgetツリーのwidget数 """
+    return 1 + sum(count_widgets(w) for w in widget.winfo_children())
+
+
+class ProfileCapture:
+    """次のN回の操作（click / key入力）をcProfile + tracemallocで記録し、directoryに書き出す
+
+    記録するのはmain thread（Tkのcallback）のみ。background threadの処理は含まれない。
+    """
+
+    SETTLE_MS = 300  # N回目の操作の後、dispatcher経由の描画が終わるまで待つ時間
+
+    def __init__(self, root, directory: str, interactions: int, on_finish):
+        self.root = root
+        self.directory = directory
+        self.interactions = interactions
+        self.on_finish = on_finish  # on_finish(出力先directory)
+        self.count = 0
+        self.active = False
+        self._profile = None
+        self._bind_ids = []
+        self.output: str | None = None
+
+    def start(self) -> None:
+        self.count = 0
+        self.active = True
+        self._started_tracemalloc = not tracemalloc.is_tracing()
+        if self._started_tracemalloc:
+            tracemalloc.start(10)
+        self._baseline = tracemalloc.take_snapshot()
+        self._profile = cProfile.Profile()
+        for sequence in ("<ButtonPress>", "<KeyPress>"):
+            self._bind_ids.append((sequence, self.root.bind_all(sequence, self._on_event, add="+")))
+        self._profile.enable()
+
+    def _on_event(self, event) -> None:
+        if not self.active or event.keysym in ("F12", "Shift_L", "Shift_R", "Control_L", "Control_R"):
+            return
+        self.count += 1
+        if self.count >= self.interactions:
+            self.active = False
+            self.root.after(self.SETTLE_MS, self.finish)
+
+    def finish(self) -> str:
+        """記録を止めてファイルを書き出し、出力先directoryを返す（途中で止めてもよい）"""
+        self.active = False
+        if self._profile is None:
+            return self.output  # 書き出し済み
+        self._profile.disable()
+        for sequence, bind_id in self._bind_ids:
+            self._unbind_all(sequence, bind_id)
+        self._bind_ids.clear()
+        snapshot = tracemalloc.take_snapshot()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+
+        out = os.path.join(self.directory, datetime.now().strftime("%Y%m%d-%H%M%S"))
+        os.makedirs(out, exist_ok=True)
+        self._profile.dump_stats(os.path.join(out, "profile.prof"))
+        snapshot.dump(os.path.join(out, "memory.tracemalloc"))
+        with open(os.path.join(out, "summary.txt"), "w", encoding="utf-8") as f:
+            f.write(f"interactions: {self.count}\n\n== cProfile（cumulative上位40）==\n")
+            pstats.Stats(self._profile, stream=f).sort_stats("cumulative").print_stats(40)
+            f.write("\n== tracemalloc（capture中に増えたメモリ上位30）==\n")
+            for stat in snapshot.compare_to(self._baseline, "lineno")[:30]:
+                f.write(f"{stat}\n")
+        self._profile = None
+        self.output = out
+        self.on_finish(out)
+        return out
+
+    def _unbind_all(self, sequence: str, bind_id: str) -> None:
+        """bind_allで追加した自分のscriptのみ外す（他のbind_allは残す）"""
+        script = self.root.tk.call("bind", "all", sequence)
+        lines = [line for line in script.split("\n") if bind_id not in line]
+        self.root.tk.call("bind", "all", sequence, "\n".join(lines))
+        self.root.deletecommand(bind_id)
+
+
+class PerfOverlay:
+    """main windowの右上に表示するperf情報（F12で表示/非表示、Shift+F12でprofile capture）"""
+
+    UPDATE_MS = 500
+
+    def __init__(self, app, profiles_dir: str, capture_interactions: int = 20):
+        self.app = app
+        self.root = app.root
+        self.profiles_dir = profiles_dir
+        self.capture_interactions = capture_interactions
+        self.capture: ProfileCapture | None = None
+        self.last_capture: str | None = None
+        self.visible = False
+        self._after_id = None
+        self.label = tk.Label(
+            self.root,
+            bg=Theme.Color.TEXT,
+            fg=Theme.Color.BACKGROUND,
+            font=("Courier", 10),
+            justify="left",
+            anchor="nw",
+            padx=6,
+            pady=4
+        )
+        self.root.bind("<F12>", lambda e: self.toggle())
+        self.root.bind("<Shift-F12>", lambda e: self.toggle_capture())
+
+    def toggle(self) -> None:
+        """overlayの表示/非表示 """
+        if self.visible:
+            self.hide()
+        else:
+            self.show()
+
+    def show(self) -> None:
+        self.visible = True
+        self.label.place(relx=1.0, x=-4, y=4, anchor="ne")
+        self.label.lift()
+        self._update()
+
+    def hide(self) -> None:
+        self.visible = False
+        self.label.place_forget()
+        if self._after_id:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    def toggle_capture(self) -> None:
+        """profile captureを開始。capture中なら途中で止めて書き出す """
+        if self.capture and self.capture.active:
+            self.capture.finish()
+            return
+        self.capture = ProfileCapture(self.root, self.profiles_dir, self.capture_interactions, self._on_capture_done)
+        self.capture.start()
+        if not self.visible:
+            self.show()
+
+    def _on_capture_done(self, path: str) -> None:
+        self.last_capture = path
+        if self.capture and not self.capture.active:
+            self.capture = None  # 書き出し待ちの間に次のcaptureが始まっていれば残す
+        self._update()
+
+    def _update(self) -> None:
+        """表示内容を更新（表示中のみ UPDATE_MS ごと）"""
+        if self._after_id:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        if not self.visible:
+            return
+        self.label.configure(text="\n".join(self._lines()))
+        self.label.lift()
+        self._after_id = self.root.after(self.UPDATE_MS, self._update)
+
+    def _lines(self) -> list[str]:
+        app = self.app
+        stats = getattr(app.task_manager, "stats", {})
+        rss = process_rss_mb()
+
+        def ms(value):
+            return "-" if value is None else f"{value:.1f}ms"
+
+        lines = [
+            f"refresh   {ms(app.last_refresh_ms)}",
+            f"widgets   {count_widgets(app.root):,}"
+            + (f" / items {len(app.canvas.find_all()):,}" if app.canvas_list else ""),
+            f"save      {ms(stats.get('save_ms'))}",
+            f"load      {ms(stats.get('load_ms'))}",
+            f"decompose {stats.get('decompose_in_flight', 0)} in flight",
+            f"rss       {'-' if rss is None else f'{rss:.1f}MB'}",
+        ]
+        backend = getattr(app.task_manager, "remote_backend", None)
+        if backend is not None:
+            parse = backend.parse_stats
+            lines.append(f"parse     json {parse['structured']} / text {parse['text']}")
+        if self.capture and self.capture.active:
+            lines.append(f"● capture {self.capture.count}/{self.capture.interactions}（Shift+F12で停止）")
+        elif self.last_capture:
+            lines.append(f"saved → {self.last_capture}")
+        return lines
@@ -0,0 +1,78 @@
+"""Main-thread dispatcher：background threadからのUI更新をframe単位でまとめて実行する"""
+import time
+import queue
+import threading
+from typing import Callable, Iterable, Set
+
+
+class UiDispatcher:
+    """thread-safeなUI更新queue
+
+    - post()：任意のcallableをmain threadで実行（1 frameあたりの件数/時間に上限あり）
+    - invalidate()：モデルの変更を通知。同じframe内の変更は1回のrefreshにまとめる
+
+    Tkはmain thread以外から触れないため、background threadはここに積むだけにする。
+    """
+
+    FRAME_MS = 16    # 処理待ちがある間のtick間隔
+    IDLE_MS = 50     # 何もない間のtick間隔
+    BUDGET_MS = 8    # 1 frameでcallbackに使う時間の上限
+    MAX_CALLS = 32   # 1 frameで実行するcallbackの上限
+
+    def __init__(self, root, on_changes: Callable[[Set[str], bool], None]):
+        self.root = root
+        self.on_changes = on_changes
+        self._calls: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._changed_ids: Set[str] = set()
+        self._structural = False
+        self._invalidated = False
+        self._after_id = self.root.after(self.IDLE_MS, self._tick)
+
+    # ---------- 任意のthreadから呼べるAPI ----------
+    def post(self, fn: Callable, *args) -> None:
+        """fn(*args) をmain threadで実行するよう予約 """
+        self._calls.put((fn, args))
+
+    def invalidate(self, task_ids: Iterable[str] = (), structural: bool = False) -> None:
+        """モデル変更を通知。structural=Trueの場合はタスクの追加/削除を含む """
+        with self._lock:
+            self._changed_ids.update(task_ids)
+            self._structural = self._structural or structural
+            self._invalidated = True
+
+    def stop(self) -> None:
+        """tickを停止 """
+        if self._after_id:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    # ---------- main thread ----------
+    def _tick(self) -> None:
+        """1 frame分の処理：callbackを上限まで実行し、溜まった変更を1回だけ反映 """
+        deadline = time.perf_counter() + self.BUDGET_MS / 1000
+        for _ in range(self.MAX_CALLS):
+            if time.perf_counter() >= deadline:
+                break
+            try:
+                fn, args = self._calls.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                fn(*args)
+            except Exception as e:
+                # 1件の失敗でdispatcher全体を止めない
+                self.root.report_callback_exception(type(e), e, e.__traceback__)
+
+        with self._lock:
+            invalidated, self._invalidated = self._invalidated, False
+            changed_ids, self._changed_ids = self._changed_ids, set()
+            structural, self._structural = self._structural, False
+        if invalidated:
+            try:
+                self.on_changes(changed_ids, structural)
+            except Exception as e:
+                self.root.report_callback_exception(type(e), e, e.__traceback__)
+
+        busy = not self._calls.empty() or self._invalidated
+        self._after_id = self.root.after(self.FRAME_MS if busy else self.IDLE_MS, self._tick)